@@ -0,0 +1,165 @@
+import os
+
+from django.contrib import admin, messages
+from django.contrib.contenttypes.models import ContentType
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from apps.jobs.models import Job
+from config.settings.base import ADMIN_EMPTY_VALUE_DISPLAY
+
+TOTALS_LABELS = {
+    'new': 'добавлено',
+    'update': 'обновлено',
+    'delete': 'удалено',
+    'skip': 'пропущено',
+    'error': 'ошибок',
+    'invalid': 'не прошло проверку',
+    'rolled_back': 'откачено',
+}
+
+
+class BackgroundImportExportMixin:
+    """
+    Импорт и экспорт ImportExportModelAdmin в фоновых задачах: запрос админки только сохраняет файл
+    и параметры в Job, а обрабатывает их команда run_jobs. Указывается перед ImportExportModelAdmin.
+    Шаг предпросмотра импорта не выполняется - ошибки строк видны в итогах задачи.
+    """
+
+    def import_action(self, request, *args, **kwargs):
+        if request.method != 'POST' or not self.has_import_permission(request):
+            return super().import_action(request, *args, **kwargs)
+        form = self.create_import_form(request)
+        if not form.is_valid():
+            return super().import_action(request, *args, **kwargs)
+        input_format = self.get_import_formats()[int(form.cleaned_data['input_format'])]
+        job = self.create_job(
+            request,
+            Job.Kind.IMPORT,
+            file_format=input_format.__name__,
+            resource=self.get_resource_index(form),
+            source=form.cleaned_data['import_file'],
+        )
+        return self.job_response(request, job)
+
+    def export_action(self, request, *args, **kwargs):
+        if request.method != 'POST' or not self.has_export_permission(request):
+            return super().export_action(request, *args, **kwargs)
+        formats = self.get_export_formats()
+        form = self.get_export_form_class()(formats, request.POST, resources=self.get_export_resource_classes())
+        if not form.is_valid():
+            return super().export_action(request, *args, **kwargs)
+        job = self.create_job(
+            request,
+            Job.Kind.EXPORT,
+            file_format=formats[int(form.cleaned_data['file_format'])].__name__,
+            resource=self.get_resource_index(form),
+            # Фильтры и поиск списка, из которого открыт экспорт.
+            query=request.GET.dict(),
+        )
+        return self.job_response(request, job)
+
+    def create_job(self, request, kind, **fields):
+        content_type = ContentType.objects.get_for_model(self.model)
+        return Job.objects.create(kind=kind, content_type=content_type, user=request.user, **fields)
+
+    def job_response(self, request, job):
+        self.message_user(request, f'Задача «{job}» поставлена в очередь.', messages.SUCCESS)
+        return redirect(reverse('admin:jobs_job_change', args=(job.pk,), current_app=self.admin_site.name))
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'content_type', 'status', 'progress', 'user', 'created_at', 'download')
+    list_filter = ('kind', 'status', 'content_type')
+    fields = (
+        'kind',
+        'content_type',
+        'status',
+        'progress',
+        'user',
+        'file_format',
+        'source_name',
+        'download',
+        'totals',
+        'errors',
+        'error',
+        'created_at',
+        'started_at',
+        'heartbeat_at',
+        'finished_at',
+    )
+    readonly_fields = fields
+    actions = ('restart',)
+    empty_value_display = ADMIN_EMPTY_VALUE_DISPLAY
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related('content_type', 'user')
+        if not request.user.is_superuser:
+            queryset = queryset.filter(user=request.user)
+        return queryset
+
+    def has_module_permission(self, request):
+        return request.user.is_active and request.user.is_staff
+
+    def has_view_permission(self, request, obj=None):
+        # Сотрудник видит свои задачи: список ограничен в get_queryset.
+        return self.has_module_permission(request)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = [path('<int:pk>/download/', self.admin_site.admin_view(self.download_view), name='jobs_job_download')]
+        return urls + super().get_urls()
+
+    def download_view(self, request, pk):
+        job = get_object_or_404(self.get_queryset(request).exclude(result=''), pk=pk)
+        return FileResponse(job.result.open('rb'), as_attachment=True, filename=os.path.basename(job.result.name))
+
+    @admin.display(description='Прогресс')
+    def progress(self, obj):
+        if not obj.total:
+            return obj.processed
+        return f'{obj.processed} из {obj.total} ({obj.processed * 100 // obj.total}%)'
+
+    @admin.display(description='Загруженный файл')
+    def source_name(self, obj):
+        return os.path.basename(obj.source.name) if obj.source else None
+
+    @admin.display(description='Файл выгрузки')
+    def download(self, obj):
+        if not obj.result:
+            return None
+        url = reverse('admin:jobs_job_download', args=(obj.pk,), current_app=self.admin_site.name)
+        return format_html('<a href="{}">{}</a>', url, os.path.basename(obj.result.name))
+
+    @admin.display(description='Итоги импорта')
+    def totals(self, obj):
+        totals = obj.summary.get('totals')
+        if not totals:
+            return None
+        items = [*totals.items(), ('rolled_back', obj.summary['rolled_back'])]
+        return format_html_join(', ', '{}: {}', ((TOTALS_LABELS[key], count) for key, count in items))
+
+    @admin.display(description='Ошибки строк')
+    def errors(self, obj):
+        if not obj.summary.get('errors'):
+            return None
+        return format_html(
+            '<ul>{}</ul>', format_html_join('', '<li>{}</li>', ((error,) for error in obj.summary['errors']))
+        )
+
+    @admin.action(description='Повторить упавшие задачи')
+    def restart(self, request, queryset):
+        # Загруженные части импорта не откатываются: задача продолжит его с сохранённого processed.
+        # Экспорт выполняется заново. Зависшие задачи воркеры забирают сами по JOB_STALE_TIMEOUT.
+        count = queryset.filter(status=Job.Status.FAILED).update(
+            status=Job.Status.PENDING, error='', started_at=None, finished_at=None
+        )
+        self.message_user(request, f'Задач поставлено в очередь: {count}', messages.SUCCESS)
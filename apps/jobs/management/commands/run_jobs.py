@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.jobs.processing import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер фоновых задач импорта и экспорта из админки: забирает задачи из очереди и выполняет их. '
+        'Можно запускать несколько воркеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Пауза между проверками пустой очереди, сек.',
+        )
+        parser.add_argument('--once', action='store_true', help='Выполнить задачи из очереди и завершиться.')
+
+    def handle(self, *args, **options):
+        while True:
+            # Долгоживущий процесс: соединение с БД могло закрыться или устареть между задачами.
+            close_old_connections()
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            self.stdout.write(f'{job}: выполняется')
+            run_job(job)
+            self.stdout.write(f'{job}: {job.get_status_display()}')
@@ -0,0 +1,45 @@
+import logging
+import shlex
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def get_next_run(moment, period):
+    """Ближайшая после moment граница периода period (сек.), отсчитываемого от местной полуночи."""
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (moment - midnight).total_seconds()
+    return midnight + timedelta(seconds=(elapsed // period + 1) * period)
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает команды обслуживания из SCHEDULED_COMMANDS: сразу при старте, а затем на границах их периодов, '
+        'отсчитываемых от местной полуночи. Работает постоянно; запускается в одном экземпляре.'
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.localtime()
+        next_runs = dict.fromkeys(settings.SCHEDULED_COMMANDS, now)
+        while True:
+            for command, period in settings.SCHEDULED_COMMANDS.items():
+                if timezone.localtime() < next_runs[command]:
+                    continue
+                # Долгоживущий процесс: соединение с БД могло закрыться или устареть между запусками.
+                close_old_connections()
+                self.stdout.write(f'{command}: выполняется')
+                try:
+                    call_command(*shlex.split(command), stdout=self.stdout, stderr=self.stderr)
+                except Exception:
+                    # Ошибка одной команды не останавливает расписание остальных.
+                    logger.exception('Команда по расписанию %s завершилась с ошибкой', command)
+                next_runs[command] = get_next_run(timezone.localtime(), period)
+            delay = (min(next_runs.values()) - timezone.localtime()).total_seconds()
+            time.sleep(max(delay, 1))
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:19
+
+import apps.jobs.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'kind',
+                    models.CharField(
+                        choices=[('import', 'Импорт'), ('export', 'Экспорт')], max_length=10, verbose_name='Тип'
+                    ),
+                ),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('pending', 'В очереди'),
+                            ('running', 'Выполняется'),
+                            ('done', 'Завершена'),
+                            ('failed', 'Ошибка'),
+                        ],
+                        default='pending',
+                        max_length=10,
+                        verbose_name='Статус',
+                    ),
+                ),
+                ('file_format', models.CharField(max_length=20, verbose_name='Формат')),
+                ('resource', models.PositiveSmallIntegerField(default=0, verbose_name='Номер ресурса')),
+                ('query', models.JSONField(blank=True, default=dict, verbose_name='Фильтры списка')),
+                (
+                    'source',
+                    models.FileField(
+                        blank=True,
+                        storage=apps.jobs.models.get_job_storage,
+                        upload_to='import/',
+                        verbose_name='Загруженный файл',
+                    ),
+                ),
+                (
+                    'result',
+                    models.FileField(
+                        blank=True,
+                        storage=apps.jobs.models.get_job_storage,
+                        upload_to='export/',
+                        verbose_name='Файл выгрузки',
+                    ),
+                ),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Всего строк')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано строк')),
+                ('summary', models.JSONField(blank=True, default=dict, verbose_name='Итоги')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало выполнения')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание выполнения')),
+                (
+                    'content_type',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='contenttypes.contenttype',
+                        verbose_name='Модель',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Пользователь',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Задача импорта/экспорта',
+                'verbose_name_plural': 'Задачи импорта/экспорта',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['status', 'created_at'], name='job_status_created_idx')],
+            },
+        )
+    ]
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+from apps.users.models import User
+
+
+def get_job_storage():
+    """Файлы задач хранятся вне MEDIA_ROOT и выдаются только через админку."""
+    return FileSystemStorage(location=settings.JOB_FILES_DIR)
+
+
+class Job(models.Model):
+    """Фоновая задача импорта или экспорта из админки. Выполняется командой run_jobs."""
+
+    class Kind(models.TextChoices):
+        IMPORT = 'import', 'Импорт'
+        EXPORT = 'export', 'Экспорт'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Завершена'
+        FAILED = 'failed', 'Ошибка'
+
+    kind = models.CharField(verbose_name='Тип', max_length=10, choices=Kind.choices)
+    status = models.CharField(verbose_name='Статус', max_length=10, choices=Status.choices, default=Status.PENDING)
+    content_type = models.ForeignKey(ContentType, verbose_name='Модель', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, verbose_name='Пользователь', on_delete=models.SET_NULL, null=True, blank=True)
+    file_format = models.CharField(verbose_name='Формат', max_length=20)
+    resource = models.PositiveSmallIntegerField(verbose_name='Номер ресурса', default=0)
+    query = models.JSONField(verbose_name='Фильтры списка', default=dict, blank=True)
+    source = models.FileField(
+        verbose_name='Загруженный файл', storage=get_job_storage, upload_to='import/', blank=True
+    )
+    result = models.FileField(verbose_name='Файл выгрузки', storage=get_job_storage, upload_to='export/', blank=True)
+    total = models.PositiveIntegerField(verbose_name='Всего строк', null=True, blank=True)
+    processed = models.PositiveIntegerField(verbose_name='Обработано строк', default=0)
+    summary = models.JSONField(verbose_name='Итоги', default=dict, blank=True)
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+    created_at = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
+    started_at = models.DateTimeField(verbose_name='Начало выполнения', null=True, blank=True)
+    finished_at = models.DateTimeField(verbose_name='Окончание выполнения', null=True, blank=True)
+    # Обновляется при каждом сохранении прогресса: по нему находятся задачи упавших воркеров.
+    heartbeat_at = models.DateTimeField(verbose_name='Последняя активность', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Задача импорта/экспорта'
+        verbose_name_plural = 'Задачи импорта/экспорта'
+        ordering = ('-created_at',)
+        indexes = (models.Index(fields=('status', 'created_at'), name='job_status_created_idx'),)
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.content_type.name} #{self.pk}'
+
+    @property
+    def model(self):
+        return self.content_type.model_class()
@@ -0,0 +1,239 @@
+import csv
+import html
+import logging
+import tempfile
+from datetime import timedelta
+from itertools import islice
+
+import tablib
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.db.models import Q
+from django.test import RequestFactory
+from django.utils import timezone
+from import_export.formats import base_formats
+from import_export.results import RowResult
+from import_export.signals import post_export, post_import
+
+from apps.jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+IMPORT_TYPES = (
+    RowResult.IMPORT_TYPE_NEW,
+    RowResult.IMPORT_TYPE_UPDATE,
+    RowResult.IMPORT_TYPE_DELETE,
+    RowResult.IMPORT_TYPE_SKIP,
+    RowResult.IMPORT_TYPE_ERROR,
+    RowResult.IMPORT_TYPE_INVALID,
+)
+# Сообщений об ошибках строк, которые сохраняются в итогах задачи.
+MAX_ERRORS = 100
+# Форматы, которые выгружаются в файл построчно, и разделитель их полей.
+STREAMED_FORMATS = {base_formats.CSV: ',', base_formats.TSV: '\t'}
+
+
+def claim_job():
+    """
+    Переводит самую старую задачу из очереди в работу и возвращает её (None, если очередь пуста).
+    SKIP LOCKED позволяет запускать несколько воркеров: задачу, которую забирает другой воркер, они пропускают.
+    Задача в работе, прогресс которой не сохранялся дольше JOB_STALE_TIMEOUT, осталась от упавшего воркера
+    и забирается снова: импорт продолжается после последней сохранённой части, экспорт выполняется заново.
+    """
+    now = timezone.now()
+    stale = Q(status=Job.Status.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOB_STALE_TIMEOUT))
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Job.Status.PENDING) | stale)
+            .order_by('created_at')
+            .first()
+        )
+        if job is not None:
+            if job.status == Job.Status.RUNNING:
+                logger.warning('Задача %s брошена воркером и будет выполнена снова', job.pk)
+            job.status = Job.Status.RUNNING
+            job.started_at = job.heartbeat_at = now
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def run_job(job):
+    """Выполняет задачу методами ModelAdmin её модели и сохраняет статус."""
+    model_admin = admin.site._registry[job.model]
+    request = build_request(job)
+    try:
+        if job.kind == Job.Kind.IMPORT:
+            run_import(job, model_admin, request)
+        else:
+            run_export(job, model_admin, request)
+    except Exception as error:
+        logger.exception('Задача %s завершилась с ошибкой', job.pk)
+        job.status = Job.Status.FAILED
+        job.error = str(error)
+    else:
+        job.status = Job.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'result', 'total', 'processed', 'summary'])
+
+
+def build_request(job):
+    """Запрос от имени автора задачи с фильтрами списка: его ждут методы ModelAdmin и ресурсов."""
+    request = RequestFactory().get('/', job.query)
+    request.user = job.user or AnonymousUser()
+    return request
+
+
+def run_import(job, model_admin, request):
+    """
+    Импортирует файл частями по JOB_CHUNK_SIZE строк, каждую часть - в своей транзакции.
+    Часть с ошибками откатывается целиком, остальные остаются загруженными.
+    Прогресс сохраняется в транзакции части, поэтому повторный запуск продолжает импорт
+    с первой незагруженной строки и не загружает строки дважды.
+    """
+    input_format = get_format(model_admin.get_import_formats(), job.file_format)
+    headers, job.total, rows = read_rows(job, input_format, model_admin.from_encoding)
+    resource_class = model_admin.get_import_resource_classes()[job.resource]
+    resource = resource_class(**model_admin.get_import_resource_kwargs(request))
+    if not job.processed:
+        job.summary = {'totals': dict.fromkeys(IMPORT_TYPES, 0), 'rolled_back': 0, 'errors': []}
+    save_progress(job)
+    rows = islice(rows, job.processed, None)
+    while chunk := list(islice(rows, settings.JOB_CHUNK_SIZE)):
+        dataset = tablib.Dataset(*chunk, headers=headers)
+        with transaction.atomic():
+            result = resource.import_data(
+                dataset,
+                dry_run=False,
+                raise_errors=False,
+                use_transactions=True,
+                rollback_on_validation_errors=True,
+                file_name=job.source.name,
+                user=job.user,
+            )
+            model_admin.generate_log_entries(result, request)
+            add_import_result(job.summary, result, job.processed, len(chunk))
+            job.processed += len(chunk)
+            save_progress(job)
+    post_import.send(sender=None, model=model_admin.model)
+
+
+def run_export(job, model_admin, request):
+    """
+    Выгружает отфильтрованный в админке список в файл, отмечая прогресс каждые JOB_CHUNK_SIZE строк.
+    CSV и TSV пишутся в файл построчно, остальные форматы tablib собирает целиком в памяти.
+    """
+    file_format = get_format(model_admin.get_export_formats(), job.file_format)
+    queryset = model_admin.get_export_queryset(request)
+    resource_class = model_admin.get_export_resource_classes()[job.resource]
+    resource = resource_class(**model_admin.get_export_resource_kwargs(request))
+    job.processed, job.total = 0, queryset.count()
+    save_progress(job)
+    filename = model_admin.get_export_filename(request, queryset, file_format)
+    escape_kwargs = {
+        'escape_html': model_admin.should_escape_html,
+        'escape_formulae': model_admin.should_escape_formulae,
+    }
+
+    # Как Resource.export, но с прогрессом.
+    resource.before_export(queryset)
+    data = tablib.Dataset(headers=resource.get_export_headers())
+    if type(file_format) in STREAMED_FORMATS:
+        with tempfile.TemporaryFile('w+', encoding=model_admin.to_encoding or 'utf-8', newline='') as file:
+            writer = csv.writer(file, delimiter=STREAMED_FORMATS[type(file_format)])
+            writer.writerow(data.headers)
+            for row in iter_export_rows(job, resource, queryset):
+                writer.writerow(escape_row(row, **escape_kwargs))
+            # Строки уже в файле: after_export получает только заголовок.
+            resource.after_export(queryset, data)
+            file.seek(0)
+            job.result.save(filename, File(file), save=False)
+    else:
+        for row in iter_export_rows(job, resource, queryset):
+            data.append(row)
+        resource.after_export(queryset, data)
+        content = file_format.export_data(data, **escape_kwargs)
+        if not file_format.is_binary():
+            content = content.encode(model_admin.to_encoding or 'utf-8')
+        job.result.save(filename, ContentFile(content), save=False)
+    post_export.send(sender=None, model=model_admin.model)
+
+
+def iter_export_rows(job, resource, queryset):
+    """Строки выгрузки; прогресс задачи сохраняется каждые JOB_CHUNK_SIZE строк."""
+    for obj in resource.iter_queryset(queryset):
+        yield resource.export_resource(obj)
+        job.processed += 1
+        if job.processed % settings.JOB_CHUNK_SIZE == 0:
+            save_progress(job)
+
+
+def escape_row(row, escape_html=False, escape_formulae=False):
+    """Экранирование строки выгрузки, как в TablibFormat.export_data."""
+    if escape_html:
+        row = [html.escape(str(cell)) for cell in row]
+    if escape_formulae:
+        row = [cell.replace('=', '', 1) if cell.startswith('=') else cell for cell in map(str, row)]
+    return row
+
+
+def get_format(formats, name):
+    format_class = next(format_class for format_class in formats if format_class.__name__ == name)
+    return format_class()
+
+
+def read_rows(job, input_format, encoding):
+    """
+    Возвращает заголовок, количество строк и итератор строк файла задачи.
+    CSV читается потоково (количество строк - отдельным проходом), остальные форматы tablib разбирает целиком.
+    """
+    if isinstance(input_format, base_formats.CSV):
+        with open(job.source.path, encoding=encoding, newline='') as file:
+            total = max(sum(1 for row in csv.reader(file) if row) - 1, 0)
+        rows = _iter_csv(job.source.path, encoding)
+        return next(rows, []), total, rows
+    with job.source.open('rb') as file:
+        data = file.read()
+    if not input_format.is_binary():
+        data = data.decode(encoding)
+    dataset = input_format.create_dataset(data)
+    return dataset.headers, len(dataset), iter(dataset)
+
+
+def _iter_csv(path, encoding):
+    """Строки CSV-файла, первая - заголовок."""
+    with open(path, encoding=encoding, newline='') as file:
+        reader = csv.reader(file)
+        headers = next(reader, [])
+        yield headers
+        width = len(headers)
+        for row in reader:
+            # Как в tablib: пустые строки пропускаются, короткие дополняются пустыми значениями.
+            if row:
+                yield (row + [''] * (width - len(row)))[:width]
+
+
+def add_import_result(summary, result, offset, size):
+    """Добавляет к итогам задачи результат импорта части из size строк, которые начинаются после offset."""
+    rolled_back = result.has_errors() or result.has_validation_errors()
+    for import_type, count in result.totals.items():
+        if not rolled_back or import_type in (RowResult.IMPORT_TYPE_ERROR, RowResult.IMPORT_TYPE_INVALID):
+            summary['totals'][import_type] += count
+    if rolled_back:
+        summary['rolled_back'] += size
+    errors = summary['errors']
+    errors.extend(str(error.error) for error in result.base_errors)
+    for number, row_errors in result.row_errors():
+        errors.extend(f'Строка {offset + number}: {error.error}' for error in row_errors)
+    for row in result.invalid_rows:
+        messages = '; '.join(f'{field}: {" ".join(values)}' for field, values in row.error_dict.items())
+        errors.append(f'Строка {offset + row.number}: {messages}')
+    del errors[MAX_ERRORS:]
+
+
+def save_progress(job):
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=['total', 'processed', 'summary', 'heartbeat_at'])
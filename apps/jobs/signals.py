@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.jobs.models import Job
+
+
+@receiver(post_delete, sender=Job)
+def delete_job_files(sender, instance, **kwargs):
+    """Удаляет загруженный и выгруженный файлы задачи вместе с ней."""
+    for file in (instance.source, instance.result):
+        if file:
+            file.delete(save=False)
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib import admin
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from import_export.formats import base_formats
+
+from apps.jobs.models import Job
+from apps.jobs.processing import IMPORT_TYPES, build_request, claim_job, run_job
+from apps.product.models import Material
+from apps.product.tests.factories import MaterialFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def job_storage(tmp_path, settings, monkeypatch):
+    """Файлы задач - во временном каталоге; по строке в части, чтобы задачи сохраняли прогресс чаще."""
+    settings.JOB_CHUNK_SIZE = 1
+    for field in ('source', 'result'):
+        storage = Job._meta.get_field(field).storage
+        monkeypatch.setitem(storage.__dict__, 'location', str(tmp_path))
+
+
+def create_job(kind, **fields):
+    return Job.objects.create(
+        kind=kind, content_type=ContentType.objects.get_for_model(Material), file_format='CSV', **fields
+    )
+
+
+def test_claim_reclaims_stale_running_job(settings):
+    heartbeat_at = timezone.now() - timedelta(seconds=settings.JOB_STALE_TIMEOUT)
+    create_job(Job.Kind.EXPORT, status=Job.Status.RUNNING, heartbeat_at=timezone.now())
+    stale = create_job(Job.Kind.EXPORT, status=Job.Status.RUNNING, heartbeat_at=heartbeat_at - timedelta(seconds=1))
+    assert claim_job() == stale
+    assert claim_job() is None
+
+
+def test_import_resumes_after_saved_chunks(admin_user):
+    MaterialFactory(name='Дуб')
+    job = create_job(Job.Kind.IMPORT, user=admin_user, status=Job.Status.FAILED, processed=1)
+    job.source.save('materials.csv', ContentFile('id,name\n,Дуб\n,Бук\n'.encode()))
+    job.summary = {'totals': {**dict.fromkeys(IMPORT_TYPES, 0), 'new': 1}, 'rolled_back': 0, 'errors': []}
+    job.save()
+    run_job(job)
+    assert job.status == Job.Status.DONE
+    assert sorted(Material.objects.values_list('name', flat=True)) == ['Бук', 'Дуб']
+    assert (job.processed, job.summary['totals']['new']) == (2, 2)
+
+
+def test_csv_export_matches_tablib(admin_user):
+    MaterialFactory.create_batch(3)
+    MaterialFactory(name='=1+1')
+    job = create_job(Job.Kind.EXPORT, user=admin_user)
+    run_job(job)
+    assert (job.status, job.processed) == (Job.Status.DONE, 4)
+    model_admin = admin.site._registry[Material]
+    request = build_request(job)
+    resource = model_admin.get_export_resource_classes()[0](**model_admin.get_export_resource_kwargs(request))
+    expected = base_formats.CSV().export_data(
+        resource.export(queryset=model_admin.get_export_queryset(request)),
+        escape_html=model_admin.should_escape_html,
+        escape_formulae=model_admin.should_escape_formulae,
+    )
+    with job.result.open('rb') as file:
+        assert file.read().decode() == expected
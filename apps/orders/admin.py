@@ -2,49 +2,58 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from import_export.admin import ImportExportModelAdmin
 
+from apps.jobs.admin import BackgroundImportExportMixin
 from apps.orders.models import Delivery, DeliveryType, Order, OrderProduct, Storehouse
+from common.admin import LargeTableAdminMixin
 
 User = get_user_model()
 
 
 @admin.register(DeliveryType)
-class DeliveryTypeAdmin(ImportExportModelAdmin):
+class DeliveryTypeAdmin(BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('id', 'name')
     search_fields = ('name',)
     list_filter = ('name',)
 
 
 @admin.register(Delivery)
-class DeliveryAdmin(ImportExportModelAdmin):
+class DeliveryAdmin(LargeTableAdminMixin, BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('id', 'address', 'phone', 'type_delivery', 'created', 'updated')
+    list_select_related = ('type_delivery',)
     search_fields = ('phone',)
-    list_filter = ('phone', 'type_delivery')
+    list_filter = ('type_delivery',)
 
 
 @admin.register(OrderProduct)
-class OrderProductAdmin(ImportExportModelAdmin):
+class OrderProductAdmin(LargeTableAdminMixin, BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('id', 'order', 'product', 'quantity', 'price', 'cost')
+    list_select_related = ('order__user', 'product')
+    search_fields = ('=order__id', 'product__name')
+    autocomplete_fields = ('order', 'product')
 
 
 class OrderProductInline(admin.TabularInline):
     model = OrderProduct
-    raw_id_fields = ['product']
+    autocomplete_fields = ('product',)
     fields = ('product', 'price', 'quantity')
     readonly_fields = ('price',)
 
 
 @admin.register(Order)
-class OrderAdmin(ImportExportModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('id', 'user', 'created', 'updated', 'paid', 'delivery', 'total_cost')
+    list_select_related = ('user', 'delivery')
     readonly_fields = ('total_cost', 'created', 'updated')
-    search_fields = ('id', 'paid')
-    list_filter = ('created', 'updated', 'paid', 'delivery')
+    search_fields = ('=id', 'user__email', 'delivery__phone')
+    list_filter = ('created', 'updated', 'paid', 'delivery__type_delivery')
+    autocomplete_fields = ('user', 'delivery')
     inlines = [OrderProductInline]
 
 
 @admin.register(Storehouse)
-class StorehouseAdmin(ImportExportModelAdmin):
+class StorehouseAdmin(LargeTableAdminMixin, BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('id', 'product', 'quantity')
-    search_fields = ('product',)
-    list_filter = ('product',)
+    list_select_related = ('product',)
+    search_fields = ('product__name', 'product__article')
+    autocomplete_fields = ('product',)
     ordering = ('pk',)
@@ -5,3 +5,6 @@ class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
     verbose_name = 'Заказы'
+
+    def ready(self):
+        from apps.orders import signals  # noqa: F401
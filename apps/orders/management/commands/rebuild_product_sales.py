@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.sales import rebuild_sales
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики продаж товаров (рейтинг популярных) по всем заказам. '
+        'Счётчики пополняет только создание заказа через API, поэтому заказы, изменённые или удалённые '
+        'в админке и импортом, расходятся со счётчиками до пересчёта. Команда запускается ежедневно '
+        'из SCHEDULED_COMMANDS.'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_sales()
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано дневных счётчиков продаж: {count}'))
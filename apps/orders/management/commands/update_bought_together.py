@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.together import update_bought_together
+
+
+class Command(BaseCommand):
+    help = (
+        'Учитывает новые заказы в матрице совместных покупок и пересчитывает списки «Покупают вместе» '
+        'затронутых товаров; запускается по расписанию, например раз в час.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Построить матрицу и списки заново по всем заказам (после изменения или удаления заказов).',
+        )
+
+    def handle(self, *args, **options):
+        orders, lists = update_bought_together(options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f'Учтено заказов: {orders}, пересчитано списков: {lists}'))
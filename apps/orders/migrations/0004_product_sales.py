@@ -0,0 +1,78 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:57
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def fill_sales(apps, schema_editor):
+    OrderProduct = apps.get_model('orders', 'OrderProduct')
+    ProductSales = apps.get_model('orders', 'ProductSales')
+    ProductSalesTotal = apps.get_model('orders', 'ProductSalesTotal')
+    daily = (
+        OrderProduct.objects.annotate(day=TruncDate('order__created'))
+        .values('product', 'day')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+    ProductSales.objects.bulk_create(
+        [ProductSales(product_id=row['product'], day=row['day'], quantity=row['total']) for row in daily],
+        batch_size=1000,
+    )
+    totals = OrderProduct.objects.values('product').annotate(total=Sum('quantity')).order_by()
+    ProductSalesTotal.objects.bulk_create(
+        [ProductSalesTotal(product_id=row['product'], quantity=row['total']) for row in totals], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [('product', '0012_trigram_indexes'), ('orders', '0003_alter_order_delivery_alter_order_user')]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesTotal',
+            fields=[
+                (
+                    'product',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='sales_total',
+                        serialize=False,
+                        to='product.product',
+                        verbose_name='Товар',
+                    ),
+                ),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Продано, шт.')),
+            ],
+            options={
+                'verbose_name': 'Продажи за всё время',
+                'verbose_name_plural': 'Продажи за всё время',
+                'indexes': [models.Index(fields=['-quantity', 'product'], name='sales_total_quantity_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Продано, шт.')),
+                (
+                    'product',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='daily_sales',
+                        to='product.product',
+                        verbose_name='Товар',
+                    ),
+                ),
+            ],
+            options={'verbose_name': 'Продажи за день', 'verbose_name_plural': 'Продажи по дням'},
+        ),
+        migrations.AddConstraint(
+            model_name='productsales',
+            constraint=models.UniqueConstraint(fields=('day', 'product'), name='unique_product_sales_day'),
+        ),
+        migrations.RunPython(fill_sales, migrations.RunPython.noop),
+    ]
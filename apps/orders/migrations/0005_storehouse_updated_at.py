@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [('orders', '0004_product_sales')]
+
+    operations = [
+        migrations.AddField(
+            model_name='storehouse',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата обновления'
+            ),
+            preserve_default=False,
+        ),
+    ]
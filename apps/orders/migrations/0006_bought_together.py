@@ -0,0 +1,89 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [('product', '0016_similar_products'), ('orders', '0005_storehouse_updated_at')]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoughtTogether',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('orders', models.PositiveIntegerField(verbose_name='Совместных заказов')),
+                ('confidence', models.FloatField(verbose_name='Доля заказов товара с партнёром')),
+                ('lift', models.FloatField(verbose_name='Lift')),
+            ],
+            options={'verbose_name': 'Покупают вместе', 'verbose_name_plural': 'Покупают вместе'},
+        ),
+        migrations.CreateModel(
+            name='CoPurchase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+            ],
+            options={'verbose_name': 'Совместные покупки', 'verbose_name_plural': 'Совместные покупки'},
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='co_purchases_counted',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Учтён в совместных покупках'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(
+                condition=models.Q(('co_purchases_counted', False)), fields=['id'], name='order_co_purchases_new_idx'
+            ),
+        ),
+        migrations.AddField(
+            model_name='copurchase',
+            name='partner',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='+',
+                to='product.product',
+                verbose_name='Партнёр',
+            ),
+        ),
+        migrations.AddField(
+            model_name='copurchase',
+            name='product',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='co_purchases',
+                to='product.product',
+                verbose_name='Товар',
+            ),
+        ),
+        migrations.AddField(
+            model_name='boughttogether',
+            name='partner',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='bought_with',
+                to='product.product',
+                verbose_name='Партнёр',
+            ),
+        ),
+        migrations.AddField(
+            model_name='boughttogether',
+            name='product',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='bought_together',
+                to='product.product',
+                verbose_name='Товар',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='copurchase',
+            constraint=models.UniqueConstraint(fields=('product', 'partner'), name='unique_co_purchase'),
+        ),
+        migrations.AddConstraint(
+            model_name='boughttogether',
+            constraint=models.UniqueConstraint(fields=('product', 'rank'), name='unique_bought_together_rank'),
+        ),
+    ]
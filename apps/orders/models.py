@@ -62,11 +62,19 @@ class Order(models.Model):
         verbose_name='Общая стоимость', default=0.00, max_digits=40, decimal_places=2, null=True, blank=True
     )
     paid = models.BooleanField(verbose_name='Оплачено', default=False)
+    co_purchases_counted = models.BooleanField(
+        verbose_name='Учтён в совместных покупках', default=False, editable=False
+    )
 
     class Meta:
         ordering = ('-created',)
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
+        indexes = (
+            models.Index(
+                fields=('id',), condition=models.Q(co_purchases_counted=False), name='order_co_purchases_new_idx'
+            ),
+        )
 
     def __str__(self):
         return f'Заказ: {self.id} - {self.user.email}'
@@ -107,6 +115,7 @@ class Storehouse(models.Model):
 
     product = models.OneToOneField(Product, verbose_name='Товар', on_delete=models.CASCADE)
     quantity = models.PositiveSmallIntegerField(verbose_name='Количество товара', default=0)
+    updated_at = models.DateTimeField(verbose_name='Дата обновления', auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Склад'
@@ -114,3 +123,77 @@ class Storehouse(models.Model):
 
     def __str__(self):
         return f'{self.product}, количество: {self.quantity}'
+
+
+class ProductSales(models.Model):
+    """Продажи товара за день. Поддерживается sales.record_sales для рейтинга популярных товаров за период."""
+
+    product = models.ForeignKey(Product, verbose_name='Товар', on_delete=models.CASCADE, related_name='daily_sales')
+    day = models.DateField(verbose_name='День')
+    quantity = models.PositiveIntegerField(verbose_name='Продано, шт.', default=0)
+
+    class Meta:
+        verbose_name = 'Продажи за день'
+        verbose_name_plural = 'Продажи по дням'
+        constraints = (UniqueConstraint(fields=('day', 'product'), name='unique_product_sales_day'),)
+
+    def __str__(self):
+        return f'{self.product_id} {self.day}: {self.quantity}'
+
+
+class ProductSalesTotal(models.Model):
+    """Продажи товара за всё время."""
+
+    product = models.OneToOneField(
+        Product, verbose_name='Товар', on_delete=models.CASCADE, primary_key=True, related_name='sales_total'
+    )
+    quantity = models.PositiveIntegerField(verbose_name='Продано, шт.', default=0)
+
+    class Meta:
+        verbose_name = 'Продажи за всё время'
+        verbose_name_plural = 'Продажи за всё время'
+        indexes = (models.Index(fields=('-quantity', 'product'), name='sales_total_quantity_idx'),)
+
+    def __str__(self):
+        return f'{self.product_id}: {self.quantity}'
+
+
+class CoPurchase(models.Model):
+    """
+    Количество заказов, в которых товар куплен вместе с партнёром, - элемент разреженной матрицы
+    совместных покупок. Строка с partner = product - количество заказов с товаром.
+    Поддерживается together.count_new_orders.
+    """
+
+    product = models.ForeignKey(Product, verbose_name='Товар', on_delete=models.CASCADE, related_name='co_purchases')
+    partner = models.ForeignKey(Product, verbose_name='Партнёр', on_delete=models.CASCADE, related_name='+')
+    orders = models.PositiveIntegerField(verbose_name='Заказов', default=0)
+
+    class Meta:
+        verbose_name = 'Совместные покупки'
+        verbose_name_plural = 'Совместные покупки'
+        constraints = (UniqueConstraint(fields=('product', 'partner'), name='unique_co_purchase'),)
+
+    def __str__(self):
+        return f'{self.product_id} + {self.partner_id}: {self.orders}'
+
+
+class BoughtTogether(models.Model):
+    """Товар, который часто покупают вместе с товаром. Списки поддерживает together.refresh_bought_together."""
+
+    product = models.ForeignKey(
+        Product, verbose_name='Товар', on_delete=models.CASCADE, related_name='bought_together'
+    )
+    partner = models.ForeignKey(Product, verbose_name='Партнёр', on_delete=models.CASCADE, related_name='bought_with')
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    orders = models.PositiveIntegerField(verbose_name='Совместных заказов')
+    confidence = models.FloatField(verbose_name='Доля заказов товара с партнёром')
+    lift = models.FloatField(verbose_name='Lift')
+
+    class Meta:
+        verbose_name = 'Покупают вместе'
+        verbose_name_plural = 'Покупают вместе'
+        constraints = (UniqueConstraint(fields=('product', 'rank'), name='unique_bought_together_rank'),)
+
+    def __str__(self):
+        return f'{self.product_id} -> {self.partner_id}: {self.confidence:.2f}'
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import OrderProduct, ProductSales, ProductSalesTotal
+
+# Периоды рейтинга популярных товаров: название - количество дней (None - за всё время).
+SALES_PERIODS = {'all': None, 'week': 7, 'month': 30}
+
+
+def record_sales(quantities, day=None):
+    """
+    Прибавляет проданное количество {id товара: шт.} к дневным и общим счётчикам.
+    Вызывается в транзакции создания заказа; товары обрабатываются по возрастанию id,
+    чтобы параллельные заказы блокировали строки в одном порядке.
+    """
+    day = day or timezone.localdate()
+    for product_id, quantity in sorted(quantities.items()):
+        _increment(ProductSales, {'product_id': product_id, 'day': day}, quantity)
+        _increment(ProductSalesTotal, {'product_id': product_id}, quantity)
+
+
+def _increment(model, lookup, quantity):
+    if model.objects.filter(**lookup).update(quantity=F('quantity') + quantity):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(quantity=quantity, **lookup)
+    except IntegrityError:
+        # Строку успел создать параллельный заказ.
+        model.objects.filter(**lookup).update(quantity=F('quantity') + quantity)
+
+
+def get_top_sales(period, top):
+    """Возвращает [(id товара, продано шт.)] самых продаваемых товаров за период из SALES_PERIODS."""
+    days = SALES_PERIODS[period]
+    if days is None:
+        rows = ProductSalesTotal.objects.filter(quantity__gt=0).order_by('-quantity', 'product')
+        return list(rows.values_list('product_id', 'quantity')[:top])
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rows = (
+        ProductSales.objects.filter(day__gte=since)
+        .values('product')
+        .annotate(total=Sum('quantity'))
+        .filter(total__gt=0)
+        .order_by('-total', 'product')
+    )
+    return list(rows.values_list('product', 'total')[:top])
+
+
+@transaction.atomic
+def rebuild_sales():
+    """Пересчитывает счётчики продаж по всем заказам. Возвращает количество дневных строк."""
+    ProductSales.objects.all().delete()
+    ProductSalesTotal.objects.all().delete()
+    daily = (
+        OrderProduct.objects.annotate(day=TruncDate('order__created'))
+        .values('product', 'day')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+    ProductSales.objects.bulk_create(
+        (ProductSales(product_id=row['product'], day=row['day'], quantity=row['total']) for row in daily.iterator()),
+        batch_size=1000,
+    )
+    totals = OrderProduct.objects.values('product').annotate(total=Sum('quantity')).order_by()
+    ProductSalesTotal.objects.bulk_create(
+        (ProductSalesTotal(product_id=row['product'], quantity=row['total']) for row in totals.iterator()),
+        batch_size=1000,
+    )
+    return ProductSales.objects.count()
@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.db.models import Sum
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from apps.orders.models import Delivery, DeliveryType, Order, OrderProduct, Storehouse
+from apps.orders.sales import record_sales
 from apps.users.serializers import UserSerializer
+from common.cache import schedule_version_bump
 
 User = get_user_model()
 
@@ -92,6 +95,7 @@ class OrderWriteSerializer(serializers.ModelSerializer):
         """Проверяет и обновляет кличество на складе после заказа."""
 
         storehouse = []
+        now = timezone.now()
         for product in products:
             ordered_product = product.get('product')
             ordered_quantity = int(product.get('quantity'))
@@ -104,14 +108,17 @@ class OrderWriteSerializer(serializers.ModelSerializer):
                 )
 
             storehouse_product.quantity -= ordered_quantity
+            # bulk_update не заполняет auto_now-поля.
+            storehouse_product.updated_at = now
             storehouse.append(storehouse_product)
 
-        Storehouse.objects.bulk_update(storehouse, ['quantity'])
+        Storehouse.objects.bulk_update(storehouse, ['quantity', 'updated_at'])
+        schedule_version_bump(Storehouse)
 
     @staticmethod
     @transaction.atomic
     def add_products(order, products):
-        """Сохраняет в базу данные заказа в OrderProduct, общую стоимость в Order."""
+        """Сохраняет в базу данные заказа в OrderProduct, общую стоимость в Order и счётчики продаж."""
 
         OrderProduct.objects.bulk_create(
             [
@@ -129,5 +136,11 @@ class OrderWriteSerializer(serializers.ModelSerializer):
         order.total_cost = order.order_products.aggregate(Sum('cost'))['cost__sum']
         order.save()
 
+        quantities = {}
+        for product in products:
+            product_id = product['product'].pk
+            quantities[product_id] = quantities.get(product_id, 0) + int(product['quantity'])
+        record_sales(quantities, timezone.localdate(order.created))
+
     def to_representation(self, instance):
         return OrderReadSerializer(instance, context={'request': self.context.get('request')}).data
@@ -0,0 +1,4 @@
+from apps.orders.models import DeliveryType, Storehouse
+from common.cache import track_versions
+
+track_versions(DeliveryType, Storehouse)
@@ -0,0 +1,162 @@
+from collections import Counter, defaultdict
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Sum
+
+from apps.orders.models import BoughtTogether, CoPurchase, Order, OrderProduct
+from common.cache import schedule_version_bump
+
+# Заказов в одной транзакции подсчёта и товаров в одной порции пересчёта списков.
+CHUNK_SIZE = 1000
+# Строк матрицы в одной команде INSERT.
+BATCH_SIZE = 1000
+
+
+def count_orders(orders):
+    """Матрица совместных покупок заказов orders: {(товар, партнёр): заказов}, с диагональю."""
+    items = OrderProduct.objects.filter(order__in=orders).order_by('order').values_list('order', 'product')
+    counts = Counter()
+    for _, rows in groupby(items.iterator(chunk_size=5000), key=lambda row: row[0]):
+        products = sorted({product_id for _, product_id in rows})
+        counts.update((product_id, partner_id) for product_id in products for partner_id in products)
+    return counts
+
+
+def add_counts(counts):
+    """
+    Прибавляет {(товар, партнёр): заказов} к матрице командами INSERT ... ON CONFLICT DO UPDATE.
+    Увеличение выполняется в базе, поэтому параллельные воркеры не теряют счёт друг друга;
+    строки идут по возрастанию ключа, чтобы воркеры блокировали их в одном порядке.
+    """
+    opts = CoPurchase._meta
+    table = connection.ops.quote_name(opts.db_table)
+    product_column, partner_column, orders_column = (
+        connection.ops.quote_name(opts.get_field(name).column) for name in ('product', 'partner', 'orders')
+    )
+    items = sorted(counts.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), BATCH_SIZE):
+            stop = start + BATCH_SIZE
+            batch = items[start:stop]
+            cursor.execute(
+                f'INSERT INTO {table} ({product_column}, {partner_column}, {orders_column}) '
+                f'VALUES {", ".join(["(%s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT ({product_column}, {partner_column}) '
+                f'DO UPDATE SET {orders_column} = {table}.{orders_column} + EXCLUDED.{orders_column}',
+                [value for (product_id, partner_id), orders in batch for value in (product_id, partner_id, orders)],
+            )
+
+
+def count_new_orders():
+    """
+    Добавляет к матрице неучтённые заказы порциями по CHUNK_SIZE, каждую - в своей транзакции
+    вместе с отметкой о подсчёте. Возвращает количество заказов и множество затронутых товаров.
+    """
+    count, affected = 0, set()
+    while True:
+        with transaction.atomic():
+            orders = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(co_purchases_counted=False)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:CHUNK_SIZE]
+            )
+            if not orders:
+                return count, affected
+            counts = count_orders(orders)
+            add_counts(counts)
+            Order.objects.filter(pk__in=orders).update(co_purchases_counted=True)
+        count += len(orders)
+        affected.update(product_id for product_id, _ in counts)
+
+
+def refresh_bought_together(products=None):
+    """
+    Пересчитывает по матрице списки BOUGHT_TOGETHER_COUNT партнёров товаров (по умолчанию всех).
+    Партнёр попадает в список, если куплен с товаром не менее чем в BOUGHT_TOGETHER_MIN_ORDERS заказах
+    и чаще, чем при независимых покупках (lift > 1); партнёры упорядочены по confidence -
+    доле заказов товара, в которых есть партнёр. Возвращает количество пересчитанных списков.
+    """
+    total = Order.objects.filter(co_purchases_counted=True).count()
+    if products is None:
+        products = CoPurchase.objects.filter(partner=F('product')).values_list('product', flat=True)
+    products = sorted(set(products))
+    for start in range(0, len(products), CHUNK_SIZE):
+        stop = start + CHUNK_SIZE
+        batch = products[start:stop]
+        matrix = defaultdict(dict)
+        cells = CoPurchase.objects.filter(product__in=batch).values_list('product', 'partner', 'orders')
+        for product_id, partner_id, orders in cells:
+            matrix[product_id][partner_id] = orders
+        partners = {partner_id for row in matrix.values() for partner_id in row}
+        diagonal = CoPurchase.objects.filter(product__in=partners, partner=F('product'))
+        product_orders = dict(diagonal.values_list('product', 'orders'))
+        rows = []
+        for product_id in batch:
+            rows.extend(rank_partners(product_id, matrix[product_id], product_orders, total))
+        with transaction.atomic():
+            BoughtTogether.objects.filter(product__in=batch).delete()
+            BoughtTogether.objects.bulk_create(rows)
+    if products:
+        schedule_version_bump(BoughtTogether)
+    return len(products)
+
+
+def rank_partners(product_id, row, product_orders, total):
+    """
+    Строки BoughtTogether товара по его строке матрицы {партнёр: совместных заказов}.
+    product_orders - {товар: заказов с товаром}, total - всего учтённых заказов.
+    """
+    orders = row.get(product_id)
+    if not orders:
+        return []
+    candidates = []
+    for partner_id, together in row.items():
+        if partner_id == product_id or together < settings.BOUGHT_TOGETHER_MIN_ORDERS:
+            continue
+        confidence = together / orders
+        lift = together * total / (orders * product_orders[partner_id])
+        if lift > 1:
+            candidates.append((confidence, lift, together, partner_id))
+    candidates.sort(key=lambda candidate: (-candidate[0], -candidate[1], candidate[3]))
+    count = settings.BOUGHT_TOGETHER_COUNT
+    return [
+        BoughtTogether(
+            product_id=product_id, partner_id=partner_id, rank=rank, orders=together, confidence=confidence, lift=lift
+        )
+        for rank, (confidence, lift, together, partner_id) in enumerate(candidates[:count], 1)
+    ]
+
+
+def update_bought_together(rebuild=False):
+    """
+    Учитывает новые заказы и пересчитывает списки затронутых ими товаров.
+    При rebuild матрица и все списки строятся заново по всем заказам, например после изменения
+    или удаления уже учтённых заказов. Возвращает количество учтённых заказов и пересчитанных списков.
+    """
+    if rebuild:
+        with transaction.atomic():
+            CoPurchase.objects.all().delete()
+            BoughtTogether.objects.all().delete()
+            Order.objects.filter(co_purchases_counted=True).update(co_purchases_counted=False)
+    count, affected = count_new_orders()
+    return count, refresh_bought_together(None if rebuild else affected)
+
+
+def get_bought_together_ids(products, exclude=(), limit=None):
+    """
+    id товаров, которые чаще всего покупают вместе с товарами products, кроме exclude:
+    партнёры нескольких товаров упорядочены по сумме confidence.
+    """
+    limit = limit or settings.BOUGHT_TOGETHER_COUNT
+    rows = (
+        BoughtTogether.objects.filter(product__in=products)
+        .exclude(partner__in=exclude)
+        .values('partner')
+        .annotate(score=Sum('confidence'))
+        .order_by('-score', 'partner')
+        .values_list('partner', flat=True)
+    )
+    return list(rows[:limit])
@@ -15,12 +15,14 @@ from apps.orders.serializers import (
     OrderReadSerializer,
     OrderWriteSerializer,
 )
+from common.cache import CachedResponseMixin
 
 
-class DeliveryTypeViewSet(viewsets.ReadOnlyModelViewSet):
+class DeliveryTypeViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для способов доставки."""
 
     queryset = DeliveryType.objects.all()
+    cache_models = (DeliveryType,)
     serializer_class = DeliveryTypeSerializer
 
 
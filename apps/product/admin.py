@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from django.utils.safestring import mark_safe
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
 from import_export.admin import ImportExportModelAdmin
 
+from apps.jobs.admin import BackgroundImportExportMixin
 from apps.product.models import (
     CartItem,
     CartModel,
@@ -15,6 +17,7 @@ from apps.product.models import (
     Material,
     Product,
 )
+from common.admin import LargeTableAdminMixin
 from config.settings.base import ADMIN_EMPTY_VALUE_DISPLAY
 
 User = get_user_model()
@@ -23,11 +26,13 @@ User = get_user_model()
 class CartItemInLine(admin.TabularInline):
     model = CartItem
     extra = 1
+    autocomplete_fields = ('cart', 'product')
 
 
 class DiscountInLine(admin.TabularInline):
     model = Discount.applied_products.through
     extra = 1
+    autocomplete_fields = ('product',)
     verbose_name = 'Скидка'
     verbose_name_plural = 'Скидки'
 
@@ -35,6 +40,7 @@ class DiscountInLine(admin.TabularInline):
 class FavoriteInLine(admin.TabularInline):
     model = Favorite
     extra = 1
+    autocomplete_fields = ('user', 'product')
     verbose_name_plural = 'В избранном'
 
 
@@ -46,7 +52,7 @@ class ProductMaterialInLine(admin.TabularInline):
 
 
 @admin.register(Category)
-class CategoriesAdmin(ImportExportModelAdmin):
+class CategoriesAdmin(BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('pk', 'name', 'slug')
     search_fields = ('name',)
     ordering = ('pk',)
@@ -55,7 +61,7 @@ class CategoriesAdmin(ImportExportModelAdmin):
 
 
 @admin.register(Material)
-class MaterialsAdmin(ImportExportModelAdmin):
+class MaterialsAdmin(BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('pk', 'name')
     search_fields = ('name',)
     ordering = ('pk',)
@@ -63,7 +69,7 @@ class MaterialsAdmin(ImportExportModelAdmin):
 
 
 @admin.register(FurnitureDetails)
-class FurnitureDetailsAdmin(ImportExportModelAdmin):
+class FurnitureDetailsAdmin(BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('pk', 'purpose', 'furniture_type', 'construction', 'swing_mechanism', 'armrest_adjustment')
     search_fields = ('purpose', 'furniture_type', 'construction', 'swing_mechanism', 'armrest_adjustment')
     list_filter = ('purpose', 'furniture_type', 'construction', 'swing_mechanism', 'armrest_adjustment')
@@ -72,7 +78,7 @@ class FurnitureDetailsAdmin(ImportExportModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(ImportExportModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = (
         'pk',
         'article',
@@ -85,48 +91,67 @@ class ProductAdmin(ImportExportModelAdmin):
         'furniture_details',
         'price',
         'fast_delivery',
-        'preview',
+        'thumbnail',
     )
+    list_select_related = ('collection', 'category', 'color', 'furniture_details')
     exclude = ('material',)
     list_editable = ('price', 'fast_delivery')
     inlines = (ProductMaterialInLine, DiscountInLine, FavoriteInLine, CartItemInLine)
     search_fields = ('article', 'name', 'brand')
-    list_filter = ('article', 'name', 'category')
+    list_filter = ('category', 'collection', 'fast_delivery')
+    autocomplete_fields = ('category', 'collection', 'color', 'furniture_details')
     readonly_fields = ('preview',)
     ordering = ('pk',)
     empty_value_display = ADMIN_EMPTY_VALUE_DISPLAY
 
+    @admin.display(description='Фото')
+    def thumbnail(self, obj):
+        return image_tag(obj, 60)
+
+    @admin.display(description='Превью')
     def preview(self, obj):
-        return mark_safe(f'<img src="{obj.image.url}" style="max-height: 150px;">')
+        return image_tag(obj, 150)
+
+
+def image_tag(obj, height):
+    """Наименьшая уменьшенная копия изображения (или оригинал, пока копий нет) с отложенной загрузкой."""
+    sizes = obj.image_variants.get('sizes')
+    url = default_storage.url(sizes[min(sizes, key=int)]['jpeg']) if sizes else obj.image.url
+    return format_html('<img src="{}" style="max-height: {}px;" loading="lazy">', url, height)
 
 
 @admin.register(CartModel)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'user', 'created_at', 'updated_at')
+    list_select_related = ('user',)
     inlines = (CartItemInLine,)
-    search_fields = ('user', 'created_at', 'updated_at')
-    list_filter = ('user', 'created_at', 'updated_at')
+    search_fields = ('user__email',)
+    list_filter = ('created_at', 'updated_at')
+    autocomplete_fields = ('user',)
     empty_value_display = ADMIN_EMPTY_VALUE_DISPLAY
 
 
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'cart', 'product', 'quantity', 'created_at', 'updated_at')
-    search_fields = ('cart', 'product')
-    list_filter = ('cart', 'product')
+    list_select_related = ('cart__user', 'product')
+    search_fields = ('cart__user__email', 'product__name')
+    list_filter = ('created_at', 'updated_at')
+    autocomplete_fields = ('cart', 'product')
     empty_value_display = ADMIN_EMPTY_VALUE_DISPLAY
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'product', 'user')
-    search_fields = ('product', 'user')
-    list_filter = ('product', 'user')
+    list_select_related = ('product', 'user')
+    search_fields = ('product__name', 'user__email')
+    autocomplete_fields = ('product', 'user')
     empty_value_display = ADMIN_EMPTY_VALUE_DISPLAY
 
 
 @admin.register(Color)
-class ColorAdmin(ImportExportModelAdmin):
+class ColorAdmin(BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('pk', 'name')
     search_fields = ('name',)
     list_filter = ('name',)
@@ -135,9 +160,10 @@ class ColorAdmin(ImportExportModelAdmin):
 
 
 @admin.register(Discount)
-class DiscountAdmin(ImportExportModelAdmin):
+class DiscountAdmin(BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('pk', 'discount', 'discount_created_at', 'discount_end_at')
     exclude = ('applied_products',)
+    autocomplete_fields = ('categories', 'collections')
     inlines = (DiscountInLine,)
     search_fields = ('discount', 'discount_created_at', 'discount_end_at')
     list_filter = ('discount', 'discount_created_at', 'discount_end_at')
@@ -146,8 +172,7 @@ class DiscountAdmin(ImportExportModelAdmin):
 
 
 @admin.register(Collection)
-class CollectionAdmin(ImportExportModelAdmin):
+class CollectionAdmin(BackgroundImportExportMixin, ImportExportModelAdmin):
     list_display = ('name', 'slug')
     search_fields = list_display
-    list_filter = list_display
     prepopulated_fields = {'slug': ('name',)}
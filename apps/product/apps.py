@@ -5,3 +5,6 @@ class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.product'
     verbose_name = 'товары'
+
+    def ready(self):
+        from apps.product import signals  # noqa: F401
@@ -18,7 +18,7 @@ class Cart:
     def extract_items_cart(self):
         """Возвращает содержимое корзины."""
         product_ids = self.cart.keys()
-        products = Product.objects.filter(id__in=product_ids)
+        products = Product.objects.with_pricing().filter(id__in=product_ids)
         products = [
             {'product': product, 'quantity': self.cart[str(product.id)].get('quantity')} for product in products
         ]
@@ -1,8 +1,9 @@
-from django.db.models import Sum
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from apps.orders.together import get_bought_together_ids
 from apps.product.models import CartItem, CartModel, Product
-from apps.product.serializers import ShortProductSerializer
+from apps.product.serializers import ShortProductSerializer, serialize_short_products
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -23,35 +24,77 @@ class CartItemCreateSerializer(serializers.ModelSerializer):
         fields = ('product', 'quantity')
 
 
-class CartModelSerializer(serializers.ModelSerializer):
-    """Сериализатор корзины пользователя."""
+class CartTotalsMixin:
+    """
+    Итоги корзины: количество, стоимость с учётом скидок и без них и вес считаются за один проход
+    по товарам корзины и запоминаются для объекта, который сериализуется.
+    Пары (товар, количество) корзины возвращает метод get_cart_items(obj) сериализатора.
+    """
 
-    total_quantity = serializers.SerializerMethodField(method_name='calculate_total_quantity')
-    total_price = serializers.SerializerMethodField(method_name='calculate_total_price')
-    total_discount_price = serializers.SerializerMethodField(method_name='calculate_total_discount_price')
-    total_weight = serializers.SerializerMethodField(method_name='calculate_total_weight')
-
-    products = CartItemSerializer(source='cartitems', many=True)
-
-    class Meta:
-        model = CartModel
-        fields = ('total_quantity', 'total_price', 'total_discount_price', 'total_weight', 'products')
+    def get_totals(self, obj):
+        totals = getattr(self, '_totals', None)
+        if totals is None or totals[0] is not obj:
+            totals = self._totals = (obj, calculate_cart_totals(self.get_cart_items(obj)))
+        return totals[1]
 
     def calculate_total_quantity(self, obj):
         """Возвращает общее количество товара в корзине."""
-        return obj.cartitems.all().aggregate(Sum('quantity'))['quantity__sum'] or 0
+        return self.get_totals(obj)['total_quantity']
 
     def calculate_total_price(self, obj):
         """Возвращает общую стоимость товара в корзине."""
-        return sum(item.product.price * item.quantity for item in obj.cartitems.all())
+        return self.get_totals(obj)['total_price']
 
     def calculate_total_discount_price(self, obj):
         """Возвращает общую сумму товара в корзине с учётом скидки."""
-        return sum(item.product.calculate_total_price() * item.quantity for item in obj.cartitems.all())
+        return self.get_totals(obj)['total_discount_price']
 
     def calculate_total_weight(self, obj):
         """Возвращает общий вес товара в корзине."""
-        return sum(item.product.weight * item.quantity for item in obj.cartitems.all())
+        return self.get_totals(obj)['total_weight']
+
+    @extend_schema_field(ShortProductSerializer(many=True))
+    def fetch_recommendations(self, obj):
+        """Возвращает товары, которые часто покупают вместе с товарами корзины."""
+        return get_recommendations([product.pk for product, _ in self.get_cart_items(obj)], self.context)
+
+
+def calculate_cart_totals(items):
+    """Итоги корзины по парам (товар, количество); цена со скидкой берётся из аннотации with_pricing."""
+    totals = {'total_quantity': 0, 'total_price': 0, 'total_discount_price': 0, 'total_weight': 0}
+    for product, quantity in items:
+        totals['total_quantity'] += quantity
+        totals['total_price'] += product.price * quantity
+        totals['total_discount_price'] += product.calculate_total_price() * quantity
+        totals['total_weight'] += product.weight * quantity
+    return totals
+
+
+class CartModelSerializer(CartTotalsMixin, serializers.ModelSerializer):
+    """Сериализатор корзины пользователя."""
+
+    total_quantity = serializers.SerializerMethodField(method_name='calculate_total_quantity')
+    total_price = serializers.SerializerMethodField(method_name='calculate_total_price')
+    total_discount_price = serializers.SerializerMethodField(method_name='calculate_total_discount_price')
+    total_weight = serializers.SerializerMethodField(method_name='calculate_total_weight')
+
+    products = CartItemSerializer(source='cartitems', many=True)
+    recommendations = serializers.SerializerMethodField(method_name='fetch_recommendations')
+
+    class Meta:
+        model = CartModel
+        fields = (
+            'total_quantity',
+            'total_price',
+            'total_discount_price',
+            'total_weight',
+            'products',
+            'recommendations',
+        )
+
+    def get_cart_items(self, obj):
+        """Пары (товар, количество) корзины из заранее загруженных позиций, см. CartModel.objects.with_items."""
+        return [(item.product, item.quantity) for item in obj.cartitems.all()]
 
 
 class CartItemDictSerializer(serializers.Serializer):
@@ -61,7 +104,7 @@ class CartItemDictSerializer(serializers.Serializer):
     quantity = serializers.IntegerField()
 
 
-class CartModelDictSerializer(serializers.Serializer):
+class CartModelDictSerializer(CartTotalsMixin, serializers.Serializer):
     """Сериализатор корзины пользователя."""
 
     total_quantity = serializers.SerializerMethodField(method_name='calculate_total_quantity')
@@ -69,22 +112,18 @@ class CartModelDictSerializer(serializers.Serializer):
     total_discount_price = serializers.SerializerMethodField(method_name='calculate_total_discount_price')
     total_weight = serializers.SerializerMethodField(method_name='calculate_total_weight')
     products = CartItemDictSerializer(many=True, read_only=True)
+    recommendations = serializers.SerializerMethodField(method_name='fetch_recommendations')
 
-    def calculate_total_quantity(self, obj):
-        """Возвращает общее количество товара в корзине."""
-        return sum(item.get('quantity') for item in obj.get('products'))
+    def get_cart_items(self, obj):
+        """Пары (товар, количество) корзины из сессии, см. Cart.extract_items_cart."""
+        return [(item.get('product'), item.get('quantity')) for item in obj.get('products')]
 
-    def calculate_total_price(self, obj):
-        """Возвращает общую стоимость товара в корзине."""
-        return sum(item.get('product').price * item.get('quantity') for item in obj.get('products'))
 
-    def calculate_total_discount_price(self, obj):
-        """Возвращает общую сумму товара в корзине с учётом скидки."""
-        return sum(item.get('product').calculate_total_price() * item.get('quantity') for item in obj.get('products'))
-
-    def calculate_total_weight(self, obj):
-        """Возвращает общий вес товара в корзине."""
-        return sum(item.get('product').weight * item.get('quantity') for item in obj.get('products'))
+def get_recommendations(products, context):
+    """Товары, которые часто покупают вместе с товарами products, кроме них самих."""
+    if not products:
+        return []
+    return serialize_short_products(get_bought_together_ids(products, exclude=products), context)
 
 
 class CartItemCreateDictSerializer(serializers.Serializer):
@@ -21,7 +21,7 @@ def cart_items(request, pk=None):
     """Возвращает данные о товарах в корзине пользователя."""
     user = request.user
     if user.is_authenticated:
-        cart, _ = CartModel.objects.get_or_create(user=user)
+        cart, _ = CartModel.objects.with_items().get_or_create(user=user)
         serializer = CartModelSerializer(instance=cart, context={'request': request})
         return Response(serializer.data)
     cart = Cart(request=request)
@@ -63,6 +63,7 @@ def add_item(request):
     if not created:
         cart_item.quantity = int(quantity)
         cart_item.save(update_fields=('quantity',))
+    cart = CartModel.objects.with_items().get(pk=cart.pk)
     serializer = CartModelSerializer(instance=cart, context={'request': request})
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -87,8 +88,8 @@ def del_item(request, id):
         cart_items = cart.extract_items_cart()
         serializer = CartModelDictSerializer(instance=cart_items, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
-    cart = user.cartmodel
-    instance = get_object_or_404(CartItem, product=product, cart=cart)
+    instance = get_object_or_404(CartItem, product=product, cart__user=user)
     instance.delete()
+    cart = CartModel.objects.with_items().get(pk=instance.cart_id)
     serializer = CartModelSerializer(instance=cart, context={'request': request})
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,155 @@
+import csv
+from datetime import datetime, time
+from itertools import islice
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.product.models import Product
+from apps.product.pricing import get_current_pricing
+from common.renderers import encode_default
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = (
+    'id',
+    'article',
+    'name',
+    'brand',
+    'category',
+    'collection',
+    'color',
+    'materials',
+    'width',
+    'height',
+    'length',
+    'weight',
+    'country',
+    'fast_delivery',
+    'price',
+    'discount',
+    'total_price',
+    'quantity',
+    'rating',
+    'updated_at',
+)
+
+
+def get_export_queryset(updated_since=None):
+    """
+    Товары для выгрузки со связанными объектами, по возрастанию id.
+    updated_since отбирает товары, у которых с этого момента менялись сам товар, цена, остаток или рейтинг.
+    Изменения категории, коллекции, цвета и материалов отмечаются в updated_at товара сигналами.
+    """
+    queryset = (
+        Product.objects.select_related('category', 'collection', 'color', 'storehouse', 'ratings')
+        .prefetch_related('material')
+        .order_by('id')
+    )
+    if updated_since is not None:
+        queryset = queryset.filter(
+            Q(updated_at__gte=updated_since)
+            | Q(pricing__updated_at__gte=updated_since)
+            | Q(storehouse__updated_at__gte=updated_since)
+            | Q(ratings__updated_at__gte=updated_since)
+        )
+    return queryset
+
+
+def parse_updated_since(value):
+    """Разбирает дату или дату и время в ISO 8601; без часового пояса - в текущем. ValueError при ошибке."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def export_rows(queryset):
+    """
+    Выдаёт словари товаров по одному. iterator с chunk_size читает товары порциями
+    (в PostgreSQL - серверным курсором) и подгружает материалы для каждой порции.
+    Действующие цены порции читаются get_current_pricing: для устаревших строк ProductPricing цена считается заново.
+    """
+    products = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    while chunk := list(islice(products, EXPORT_CHUNK_SIZE)):
+        pricing = get_current_pricing([product.pk for product in chunk])
+        for product in chunk:
+            yield _get_row(product, *pricing[product.pk][:2])
+
+
+async def aiterate(stream):
+    """
+    Асинхронный итератор по потоку выгрузки для ASGI: синхронный итератор Django собрал бы в список целиком.
+    Части читаются порциями в потоке sync_to_async, где выполнялось представление и открыто соединение с БД.
+    """
+    parts = iter(stream)
+    next_chunk = sync_to_async(lambda: list(islice(parts, EXPORT_CHUNK_SIZE)))
+    while chunk := await next_chunk():
+        for part in chunk:
+            yield part
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['materials'] = ', '.join(row['materials'])
+        yield writer.writerow(row[field] for field in EXPORT_FIELDS)
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield orjson.dumps(row, default=encode_default) + b'\n'
+
+
+# Формат выгрузки: функция потока, тип содержимого, расширение файла.
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8', 'csv'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson', 'jsonl'),
+}
+
+
+def _get_row(product, discount, total_price):
+    storehouse, rating = (_get_related(product, name) for name in ('storehouse', 'ratings'))
+    return {
+        'id': product.pk,
+        'article': product.article,
+        'name': product.name,
+        'brand': product.brand,
+        'category': product.category.name,
+        'collection': product.collection.name if product.collection else None,
+        'color': product.color.name,
+        'materials': [material.name for material in product.material.all()],
+        'width': product.width,
+        'height': product.height,
+        'length': product.length,
+        'weight': product.weight,
+        'country': product.country,
+        'fast_delivery': product.fast_delivery,
+        'price': product.price,
+        'discount': discount,
+        'total_price': total_price,
+        'quantity': storehouse.quantity if storehouse else 0,
+        'rating': rating.average_rating if rating else None,
+        'updated_at': product.updated_at,
+    }
+
+
+def _get_related(product, name):
+    try:
+        return getattr(product, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: writerow возвращает строку вместо записи в буфер."""
+
+    def write(self, value):
+        return value
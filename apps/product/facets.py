@@ -0,0 +1,89 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Case, Count, Value, When
+
+from apps.orders.models import Storehouse
+from apps.product.filters import ProductsFilter
+from apps.product.models import Category, Collection, Color, Discount, Favorite, Material, Product, ProductPricing
+from common.cache import get_model_version
+
+# Фасет: название, поля группировки (значение, подпись), параметры фильтра, которые он исключает.
+FACETS = (
+    ('category', ('category__slug', 'category__name'), ('category',)),
+    ('collection', ('collection__slug', 'collection__name'), ('collection',)),
+    ('brand', ('brand', 'brand'), ('brand',)),
+    ('color', ('color', 'color__name'), ('color',)),
+    ('material', ('material', 'material__name'), ('material',)),
+    ('fast_delivery', ('fast_delivery', 'fast_delivery'), ('fast_delivery',)),
+    ('price', None, ('min_total_price', 'max_total_price')),
+)
+# Параметры, не влияющие на состав выборки.
+IGNORED_PARAMS = ('cursor', 'page_size', 'ordering')
+# Модели, от которых зависят значения и количества фасетов: их версии входят в ключ кэша.
+# Избранное добавляется только для фильтра is_favorited.
+CACHE_MODELS = (Product, ProductPricing, Storehouse, Discount, Category, Collection, Color, Material)
+
+
+def normalize_params(params):
+    """Возвращает отсортированные непустые параметры фильтрации."""
+    return sorted(
+        (key, value) for key in params if key not in IGNORED_PARAMS for value in params.getlist(key) if value != ''
+    )
+
+
+def get_cache_key(params, user):
+    """
+    Ключ кэша по нормализованным параметрам и версиям моделей (см. common.cache.track_versions):
+    после изменения товаров, цен, остатков или справочников фасеты считаются заново.
+    Избранное зависит от пользователя.
+    """
+    normalized = normalize_params(params)
+    models = CACHE_MODELS
+    if user.is_authenticated and any(key == 'is_favorited' for key, value in normalized):
+        normalized.append(('user', user.pk))
+        models += (Favorite,)
+    normalized.append(('versions', [get_model_version(model) for model in models]))
+    return 'product_facets:' + hashlib.md5(urlencode(normalized).encode()).hexdigest()
+
+
+def compute_facets(queryset, params, request):
+    """
+    Считает количество товаров для значений каждого фасета.
+    Для фасета применяются все фильтры, кроме его собственного, - один сгруппированный запрос на фасет.
+    """
+    facets = {}
+    for name, fields, own_params in FACETS:
+        data = params.copy()
+        for param in own_params:
+            data.pop(param, None)
+        filtered = ProductsFilter(data, queryset=queryset, request=request).qs.order_by()
+        facets[name] = count_price_buckets(filtered) if fields is None else count_values(filtered, *fields)
+    return facets
+
+
+def count_values(queryset, value_field, name_field):
+    rows = (
+        queryset.exclude(**{f'{value_field}__isnull': True})
+        .values(value_field, name_field)
+        .annotate(count=Count('id', distinct=True))
+        .order_by('-count', value_field)
+    )
+    return [{'value': row[value_field], 'name': row[name_field], 'count': row['count']} for row in rows]
+
+
+def count_price_buckets(queryset):
+    """Количество товаров по диапазонам итоговой цены."""
+    bounds = settings.PRICE_FACET_BOUNDS
+    bucket = Case(
+        *(When(pricing__total_price__lt=bound, then=Value(index)) for index, bound in enumerate(bounds)),
+        default=Value(len(bounds)),
+    )
+    rows = queryset.annotate(price_bucket=bucket).values('price_bucket').annotate(count=Count('id', distinct=True))
+    counts = {row['price_bucket']: row['count'] for row in rows}
+    edges = (0, *bounds, None)
+    return [
+        {'min': edges[index], 'max': edges[index + 1], 'count': counts.get(index, 0)}
+        for index in range(len(bounds) + 1)
+    ]
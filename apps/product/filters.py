@@ -1,7 +1,7 @@
-from django.db.models import F
 from django_filters import rest_framework as filters
 
-from apps.product.models import Category, Collection, Product
+from apps.product.models import Category, Collection, Color, Material, Product
+from apps.product.search import search_products
 
 
 class ProductsFilter(filters.FilterSet):
@@ -12,9 +12,11 @@ class ProductsFilter(filters.FilterSet):
         queryset=Collection.objects.all(), field_name='collection__slug', to_field_name='slug'
     )
     brand = filters.CharFilter(lookup_expr='icontains')
+    color = filters.ModelMultipleChoiceFilter(queryset=Color.objects.all())
+    material = filters.ModelMultipleChoiceFilter(queryset=Material.objects.all())
     fast_delivery = filters.BooleanFilter()
-    min_total_price = filters.NumberFilter(method='filter_total_price', lookup_expr='gte')
-    max_total_price = filters.NumberFilter(method='filter_total_price', lookup_expr='lte')
+    min_total_price = filters.NumberFilter(field_name='pricing__total_price', lookup_expr='gte')
+    max_total_price = filters.NumberFilter(field_name='pricing__total_price', lookup_expr='lte')
     weight = filters.RangeFilter()
     warranty = filters.RangeFilter()
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
@@ -22,6 +24,8 @@ class ProductsFilter(filters.FilterSet):
     min_rating = filters.NumberFilter(field_name='ratings__average_rating', lookup_expr='gte')
     max_rating = filters.NumberFilter(field_name='ratings__average_rating', lookup_expr='lte')
     name = filters.CharFilter(method='filter_name')
+    q = filters.CharFilter(method='filter_search', label='Полнотекстовый поиск')
+    ordering = filters.OrderingFilter(fields=(('pricing__total_price', 'total_price'), ('name', 'name')))
 
     class Meta:
         model = Product
@@ -29,6 +33,8 @@ class ProductsFilter(filters.FilterSet):
             'category',
             'collection',
             'brand',
+            'color',
+            'material',
             'fast_delivery',
             'min_total_price',
             'max_total_price',
@@ -40,6 +46,11 @@ class ProductsFilter(filters.FilterSet):
             'max_rating',
         )
 
+    def filter_queryset(self, queryset):
+        # Строка ProductPricing есть у каждого товара. INNER JOIN (а не LEFT JOIN) позволяет фильтровать
+        # и сортировать по цене сканированием индекса pricing_total_price_idx.
+        return super().filter_queryset(queryset.filter(pricing__isnull=False))
+
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
             return queryset.filter(favorites__user=self.request.user)
@@ -50,18 +61,8 @@ class ProductsFilter(filters.FilterSet):
             return queryset.filter(storehouse__quantity__gt=0)
         return queryset
 
-    def filter_total_price(self, queryset, name, value):
-        if value is not None:
-            queryset = queryset.annotate(total_price=F('price') * (1 - F('discounts') / 100))
-            min_total_price = self.data.get('min_total_price')
-            max_total_price = self.data.get('max_total_price')
-            if min_total_price and max_total_price:
-                return queryset.filter(total_price__range=(min_total_price, max_total_price))
-            elif min_total_price:
-                return queryset.filter(total_price__gte=min_total_price)
-            elif max_total_price:
-                return queryset.filter(total_price__lte=max_total_price)
-        return queryset
+    def filter_search(self, queryset, name, value):
+        return search_products(queryset, value)
 
     def filter_name(self, queryset, name, value):
         return queryset.filter(name__icontains=value)
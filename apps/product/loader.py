@@ -0,0 +1,294 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+
+from django.db import connection
+
+from apps.orders.models import Storehouse
+from apps.product.models import Category, Collection, Color, FurnitureDetails, Material, Product
+from apps.product.pricing import refresh_pricing
+from apps.product.search import update_search_vector
+from apps.product.similarity import mark_similar_stale
+from common.cache import schedule_version_bump
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+# Справочники: файл, модель, поля естественного ключа (по ним строки файла сопоставляются с таблицей).
+REFERENCE_FILES = (
+    ('category.csv', Category, ('slug',)),
+    ('collections.csv', Collection, ('slug',)),
+    ('colors.csv', Color, ('name',)),
+    ('materials.csv', Material, ('name',)),
+    (
+        'furniture_details.csv',
+        FurnitureDetails,
+        ('purpose', 'furniture_type', 'construction', 'swing_mechanism', 'armrest_adjustment'),
+    ),
+)
+PRODUCT_FILE = 'products.csv'
+STORE_FILE = 'store.csv'
+# Поля товара, которые обновляет повторная загрузка; внешние ключи - из id в файлах справочников.
+PRODUCT_FIELDS = (
+    'name',
+    'width',
+    'height',
+    'length',
+    'weight',
+    'image',
+    'fast_delivery',
+    'country',
+    'brand',
+    'warranty',
+    'price',
+    'description',
+    'color',
+    'category',
+    'collection',
+    'furniture_details',
+)
+PRODUCT_RELATIONS = {
+    'color': Color,
+    'category': Category,
+    'collection': Collection,
+    'furniture_details': FurnitureDetails,
+}
+
+
+class LoadError(Exception):
+    pass
+
+
+def read_csv(path):
+    """Читает строки CSV-файла словарями; пробелы вокруг названий колонок отбрасываются."""
+    with open(path, encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        header = [name.strip() for name in next(reader, [])]
+        for row in reader:
+            if row:
+                yield dict(zip(header, row))
+
+
+def clean_value(field, value):
+    """Приводит значение из файла к типу поля модели; пустая строка в поле с null=True - None."""
+    if value == '' and field.null:
+        return None
+    return field.to_python(value)
+
+
+def load_reference(path, model, key_fields):
+    """
+    Добавляет недостающие записи справочника, не меняя существующие.
+    Возвращает количество строк файла и словарь {id в файле: id в базе}.
+    """
+    rows = {}
+    for row in read_csv(path):
+        fields = (model._meta.get_field(name) for name in row if name != 'id')
+        rows[row['id']] = model(**{field.name: clean_value(field, row[field.name]) for field in fields})
+    keys = {file_id: tuple(getattr(obj, name) for name in key_fields) for file_id, obj in rows.items()}
+    existing = _get_keys(model, key_fields)
+    new = {key: obj for file_id, obj in rows.items() if (key := keys[file_id]) not in existing}
+    if new:
+        model.objects.bulk_create(new.values(), batch_size=BATCH_SIZE)
+        existing = _get_keys(model, key_fields)
+    return len(rows), {file_id: existing[key] for file_id, key in keys.items()}
+
+
+def _get_keys(model, key_fields):
+    return {tuple(values[1:]): values[0] for values in model.objects.values_list('pk', *key_fields)}
+
+
+def resolve(ids, model, value, null=False):
+    """
+    id записи справочника в базе по id из файла. Без файла справочника id считаются id в базе.
+    Неизвестный id в необязательной связи (null=True) заменяется на None с предупреждением в логе.
+    """
+    if value == '':
+        return None
+    if ids is None:
+        return int(value)
+    if value in ids:
+        return ids[value]
+    message = f'{model._meta.verbose_name} с id {value} нет в файле справочника.'
+    if not null:
+        raise LoadError(message)
+    logger.warning(message)
+    return None
+
+
+def load_products(path, references, use_copy=True):
+    """
+    Добавляет и обновляет товары по артикулу, затем приводит их материалы к списку из файла.
+    Возвращает количество строк и словари {id товара в файле: id в базе}.
+    """
+    fields = {name: Product._meta.get_field(name) for name in PRODUCT_FIELDS}
+    products, materials = {}, {}
+    for row in read_csv(path):
+        values = {}
+        for name, field in fields.items():
+            if name in PRODUCT_RELATIONS:
+                model = PRODUCT_RELATIONS[name]
+                values[field.attname] = resolve(references.get(model), model, row[name], field.null)
+            else:
+                values[name] = clean_value(field, row[name])
+        product = Product(article=int(row['article']), **values)
+        products[row['id']] = product
+        materials[product.article] = {
+            resolve(references.get(Material), Material, value.strip()) for value in row['material'].split(',')
+        } - {None}
+
+    upsert(Product, products.values(), ('article',), ['updated_at', *PRODUCT_FIELDS], use_copy)
+    ids = dict(Product.objects.values_list('article', 'pk'))
+    links = {(ids[article], material) for article, values in materials.items() for material in values}
+    product_ids = [ids[article] for article in materials]
+    update_links(Product.material.through, 'product_id', 'material_id', product_ids, links, use_copy)
+    return len(products), {file_id: ids[product.article] for file_id, product in products.items()}
+
+
+def load_store(path, product_ids, use_copy=True):
+    """Добавляет и обновляет остатки товаров на складе. Возвращает количество строк."""
+    rows = [
+        Storehouse(product_id=resolve(product_ids, Product, row['product']), quantity=int(row['quantity']))
+        for row in read_csv(path)
+    ]
+    upsert(Storehouse, rows, ('product',), ['quantity', 'updated_at'], use_copy)
+    return len(rows)
+
+
+def upsert(model, objs, unique_fields, update_fields, use_copy=True):
+    """
+    INSERT ... ON CONFLICT DO UPDATE по уникальным полям unique_fields.
+    В PostgreSQL строки передаются командой COPY во временную таблицу, а не тысячами параметров INSERT,
+    и совпадающие с таблицей строки не перезаписываются. Иначе - bulk_create порциями по BATCH_SIZE.
+    """
+    # Строка с повторяющимся ключом затёрла бы предыдущую, а ON CONFLICT не обновляет строку дважды.
+    opts = model._meta
+    key_attnames = [opts.get_field(name).attname for name in unique_fields]
+    objs = list({tuple(getattr(obj, name) for name in key_attnames): obj for obj in objs}.values())
+    if not use_copy:
+        model.objects.bulk_create(
+            objs,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+        return
+    fields = [field for field in opts.concrete_fields if not field.primary_key and field.name != 'search_vector']
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(opts.db_table)
+    updated = [opts.get_field(name) for name in update_fields]
+    compared = [field for field in updated if not getattr(field, 'auto_now', False)]
+    assignments = ', '.join(f'{column} = EXCLUDED.{column}' for column in _quote_columns(updated))
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TEMP TABLE load_rows AS SELECT {columns} FROM {table} WITH NO DATA')
+        copy_rows(cursor, 'load_rows', fields, objs)
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) SELECT {columns} FROM load_rows '
+            f'ON CONFLICT ({", ".join(_quote_columns(opts.get_field(name) for name in unique_fields))}) '
+            f'DO UPDATE SET {assignments} '
+            f'WHERE ({", ".join(f"{table}.{column}" for column in _quote_columns(compared))}) '
+            f'IS DISTINCT FROM ({", ".join(f"EXCLUDED.{column}" for column in _quote_columns(compared))})'
+        )
+        cursor.execute('DROP TABLE load_rows')
+
+
+def update_links(through, source, target, source_ids, links, use_copy=True):
+    """Приводит строки промежуточной таблицы многие-ко-многим для объектов source_ids к набору пар links."""
+    existing = {}
+    for batch in _batches(list(source_ids)):
+        queryset = through.objects.filter(**{f'{source}__in': batch}).values_list('pk', source, target)
+        existing.update(((pair_source, pair_target), pk) for pk, pair_source, pair_target in queryset)
+    for batch in _batches([pk for pair, pk in existing.items() if pair not in links]):
+        through.objects.filter(pk__in=batch).delete()
+    rows = [through(**{source: pair[0], target: pair[1]}) for pair in links if pair not in existing]
+    if use_copy:
+        fields = [through._meta.get_field(source), through._meta.get_field(target)]
+        with connection.cursor() as cursor:
+            copy_rows(cursor, through._meta.db_table, fields, rows)
+    else:
+        through.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def copy_rows(cursor, table, fields, objs):
+    """Передаёт объекты в таблицу командой COPY в формате CSV порциями по BATCH_SIZE строк."""
+    sql = f'COPY {connection.ops.quote_name(table)} ({", ".join(_quote_columns(fields))}) FROM STDIN WITH (FORMAT csv)'
+    buffer = io.StringIO()
+    for index, obj in enumerate(objs, 1):
+        buffer.write(','.join(_copy_value(field.get_prep_value(field.pre_save(obj, True))) for field in fields))
+        buffer.write('\n')
+        if index % BATCH_SIZE == 0:
+            _flush(cursor, sql, buffer)
+            buffer = io.StringIO()
+    _flush(cursor, sql, buffer)
+
+
+def _batches(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        stop = start + BATCH_SIZE
+        yield items[start:stop]
+
+
+def _flush(cursor, sql, buffer):
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+
+
+def _copy_value(value):
+    # В CSV-формате COPY пустое значение без кавычек - NULL, а "" - пустая строка.
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, bool):
+        value = 'true' if value else 'false'
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _quote_columns(fields):
+    return [connection.ops.quote_name(field.column) for field in fields]
+
+
+def load_catalog(directory, use_copy=True):
+    """
+    Загружает каталог из CSV-файлов каталога directory: справочники, товары с материалами, остатки на складе.
+    Отсутствующие файлы пропускаются. После каждого файла выдаёт (имя файла, количество строк, секунды).
+    Загрузка идемпотентна: товары сопоставляются по артикулу, справочники - по естественному ключу.
+    Вызывать в транзакции.
+    """
+    references, product_ids = {}, None
+    for name, model, key_fields in REFERENCE_FILES:
+        if path := get_file_path(directory, name):
+            started = time.monotonic()
+            count, references[model] = load_reference(path, model, key_fields)
+            schedule_version_bump(model)
+            yield name, count, time.monotonic() - started
+
+    if path := get_file_path(directory, PRODUCT_FILE):
+        started = time.monotonic()
+        count, product_ids = load_products(path, references, use_copy)
+        products = list(product_ids.values())
+        # Массовая вставка не отправляет сигналы, поэтому цены и поисковые векторы пересчитываются здесь.
+        refresh_pricing(products)
+        update_search_vector(products)
+        mark_similar_stale(products)
+        schedule_version_bump(Product)
+        schedule_version_bump(Material)
+        yield PRODUCT_FILE, count, time.monotonic() - started
+
+    if path := get_file_path(directory, STORE_FILE):
+        started = time.monotonic()
+        count = load_store(path, product_ids, use_copy)
+        schedule_version_bump(Storehouse)
+        yield STORE_FILE, count, time.monotonic() - started
+
+
+def get_file_path(directory, name):
+    path = os.path.join(directory, name)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,82 @@
+import io
+import json
+import timeit
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from common.renderers import MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer
+
+BENCHMARKS = (
+    ('json (DRF)', JSONRenderer(), JSONParser()),
+    ('orjson', ORJSONRenderer(), ORJSONParser()),
+    ('msgpack', MessagePackRenderer(), MessagePackParser()),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость рендереров и парсеров ответов на каталоге товаров из дампа: '
+        'страница списка товаров в формате ProductSerializer с Decimal-ценами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dump', default=str(settings.BASE_DIR / 'data' / 'db_dump.json'), help='Путь к дампу.')
+        parser.add_argument('--size', type=int, default=1000, help='Количество товаров в ответе.')
+        parser.add_argument('--number', type=int, default=50, help='Количество повторов.')
+
+    def handle(self, *args, **options):
+        data = build_payload(options['dump'], options['size'])
+        number = options['number']
+        self.stdout.write(f'Товаров в ответе: {len(data["results"])}, повторов: {number}')
+        self.stdout.write(f'{"формат":<12}{"размер, КБ":>12}{"рендер, мс":>12}{"парсинг, мс":>13}')
+        for name, renderer, parser in BENCHMARKS:
+            content = renderer.render(data)
+            render_time = timeit.timeit(lambda: renderer.render(data), number=number) / number
+            parse_time = timeit.timeit(lambda: parser.parse(io.BytesIO(content)), number=number) / number
+            self.stdout.write(
+                f'{name:<12}{len(content) / 1024:>12.1f}{render_time * 1000:>12.2f}{parse_time * 1000:>13.2f}'
+            )
+
+
+def build_payload(path, size):
+    """Собирает из дампа ответ списка товаров в формате ProductSerializer, повторяя товары до size штук."""
+    with open(path, encoding='utf-8') as file:
+        dump = json.load(file)
+    objects = {}
+    for row in dump:
+        objects.setdefault(row['model'], {})[row['pk']] = row['fields']
+    categories, colors, materials = (
+        objects.get(model, {}) for model in ('product.category', 'product.color', 'product.material')
+    )
+    products = [
+        {
+            'id': pk,
+            'article': fields['article'],
+            'name': fields['name'],
+            'is_favorited': False,
+            'price': Decimal(fields['price']),
+            'discount': 0,
+            'total_price': Decimal(fields['price']),
+            'available_quantity': 5,
+            'image': f'{settings.MEDIA_URL}{fields["image"]}',
+            'category': {'id': fields['category'], **categories.get(fields['category'], {})},
+            'material': [{'id': material, **materials.get(material, {})} for material in fields['material']],
+            'width': fields['width'],
+            'height': fields['height'],
+            'length': fields['length'],
+            'weight': Decimal(fields['weight']),
+            'fast_delivery': fields['fast_delivery'],
+            'country': fields['country'],
+            'brand': fields['brand'],
+            'warranty': fields['warranty'],
+            'description': fields['description'],
+            'color': {'id': fields['color'], **colors.get(fields['color'], {})},
+        }
+        for pk, fields in objects.get('product.product', {}).items()
+    ]
+    results = [products[index % len(products)] for index in range(size)] if products else []
+    return {'next': None, 'previous': None, 'results': results}
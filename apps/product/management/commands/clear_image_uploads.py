@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.product.uploads import clear_expired_uploads
+
+
+class Command(BaseCommand):
+    help = 'Удаляет незавершённые загрузки изображений по частям старше IMAGE_UPLOAD_EXPIRE_HOURS.'
+
+    def handle(self, *args, **options):
+        count = clear_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Удалено незавершённых загрузок: {count}'))
@@ -0,0 +1,67 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.product.models import Collection, Product
+from common.cache import schedule_version_bump
+from common.images import build_variants, bulk_update_variants
+
+# Объектов в одном UPDATE вариантов.
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит уменьшенные копии изображений товаров и коллекций, у которых их ещё нет. '
+        'Изображения обрабатываются параллельно в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(), help='Количество процессов обработки.'
+        )
+        parser.add_argument('--force', action='store_true', help='Перестроить копии всех изображений.')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        # Одно изображение (например, заглушка по умолчанию) может быть у многих объектов.
+        objects = {}
+        for model in (Product, Collection):
+            for pk, image, variants in model.objects.values_list('pk', 'image', 'image_variants').iterator():
+                if image and (options['force'] or variants.get('source') != image):
+                    objects.setdefault(image, []).append((model, pk))
+
+        done = failed = 0
+        pending = {model: [] for model in (Product, Collection)}
+        updated = set()
+        processes = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        # Потоки читают файлы и сохраняют результат, пока процессы заняты Pillow.
+        with processes, ThreadPoolExecutor(workers) as threads:
+            futures = {image: threads.submit(build_variants, image, processes) for image in objects}
+            for image, future in futures.items():
+                try:
+                    variants = future.result()
+                except Exception as error:
+                    failed += len(objects[image])
+                    self.stderr.write(f'{image}: {error}')
+                    continue
+                for model, pk in objects[image]:
+                    pending[model].append((pk, image, variants))
+                    if len(pending[model]) >= BATCH_SIZE:
+                        done += self.flush(model, pending[model], updated)
+        for model, rows in pending.items():
+            done += self.flush(model, rows, updated)
+        for model in updated:
+            schedule_version_bump(model)
+        self.stdout.write(self.style.SUCCESS(f'Построены копии изображений: {done}, ошибок: {failed}'))
+
+    def flush(self, model, rows, updated):
+        """Записывает накопленные варианты модели одним UPDATE и очищает rows."""
+        if not rows:
+            return 0
+        count = bulk_update_variants(model, rows)
+        rows.clear()
+        if count:
+            updated.add(model)
+        return count
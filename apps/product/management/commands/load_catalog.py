@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.product.loader import LoadError, load_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает каталог из CSV-файлов (category.csv, collections.csv, colors.csv, materials.csv, '
+        'furniture_details.csv, products.csv, store.csv) одной транзакцией. Повторная загрузка обновляет товары '
+        'по артикулу. В PostgreSQL строки передаются командой COPY, в остальных СУБД - через bulk_create. '
+        'Копии изображений затем строит generate_image_variants.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory', nargs='?', default=str(settings.BASE_DIR / 'data'), help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument('--no-copy', action='store_true', help='Не использовать COPY даже в PostgreSQL.')
+
+    def handle(self, *args, **options):
+        use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        total_count = total_time = 0
+        try:
+            with transaction.atomic():
+                for name, count, seconds in load_catalog(options['directory'], use_copy):
+                    self.stdout.write(f'{name}: {format_rate(count, seconds)}')
+                    total_count += count
+                    total_time += seconds
+        except (LoadError, OSError) as error:
+            raise CommandError(error)
+        if not total_count:
+            raise CommandError(f'В каталоге {options["directory"]} нет файлов каталога.')
+        self.stdout.write(self.style.SUCCESS(f'Всего: {format_rate(total_count, total_time)}'))
+
+
+def format_rate(count, seconds):
+    return f'{count} строк за {seconds:.2f} с ({count / max(seconds, 1e-6):.0f} строк/с)'
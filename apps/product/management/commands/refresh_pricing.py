@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.product.pricing import refresh_pricing, refresh_stale_pricing
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает действующие цены товаров. Без аргументов обновляет только товары, '
+        'у которых открылось или закрылось окно скидки, и товары без цены; запускается по расписанию '
+        '(run_schedule) сразу после полуночи и затем каждый час.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Пересчитать цены всех товаров.')
+
+    def handle(self, *args, **options):
+        count = refresh_pricing() if options['all'] else refresh_stale_pricing()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено цен товаров: {count}'))
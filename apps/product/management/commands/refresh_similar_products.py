@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.product.similarity import refresh_queued_similar
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает списки похожих товаров, на которые влияют изменённые товары из очереди пересчёта. '
+        'Без --once работает постоянно и проверяет очередь каждые --interval секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать списки всех товаров и завершиться; запускается по расписанию раз в сутки.',
+        )
+        parser.add_argument('--once', action='store_true', help='Обработать очередь и завершиться.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.SIMILAR_PRODUCTS_POLL_INTERVAL,
+            help='Пауза между проверками очереди, сек.',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            count = refresh_queued_similar(rebuild=True)
+            self.stdout.write(self.style.SUCCESS(f'Пересчитано списков похожих товаров: {count}'))
+            return
+        while True:
+            # Долгоживущий процесс: соединение с БД могло закрыться или устареть между проверками.
+            close_old_connections()
+            if count := refresh_queued_similar():
+                self.stdout.write(f'Пересчитано списков похожих товаров: {count}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from common.cache import CachedResponseMixin, get_response_cache_stats
+from config.api_router import router
+
+
+class Command(BaseCommand):
+    help = 'Выводит счётчики попаданий и промахов кэша ответов по вьюсетам.'
+
+    def handle(self, *args, **options):
+        for prefix, viewset, basename in router.registry:
+            if not issubclass(viewset, CachedResponseMixin):
+                continue
+            stats = get_response_cache_stats(viewset.__name__)
+            total = stats['hit'] + stats['miss']
+            ratio = stats['hit'] / total if total else 0
+            self.stdout.write(
+                f'{prefix}: попаданий {stats["hit"]}, промахов {stats["miss"]}, доля попаданий {ratio:.1%}'
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.product.search import update_search_vector
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает поисковые векторы всех товаров (например, после массовой загрузки каталога).'
+
+    def handle(self, *args, **options):
+        count = update_search_vector()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено поисковых векторов: {count}'))
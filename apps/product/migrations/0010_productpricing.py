@@ -0,0 +1,63 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:48
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def fill_pricing(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    Discount = apps.get_model('product', 'Discount')
+    ProductPricing = apps.get_model('product', 'ProductPricing')
+    today = timezone.localdate()
+    discounts = {}
+    for discount in Discount.objects.prefetch_related('applied_products'):
+        for product in discount.applied_products.all():
+            discounts.setdefault(product.pk, []).append(discount)
+    rows = []
+    for product in Product.objects.only('pk', 'price').iterator():
+        product_discounts = discounts.get(product.pk, [])
+        active = [d for d in product_discounts if d.discount_created_at <= today <= d.discount_end_at]
+        bounds = [d.discount_end_at for d in active] + [
+            d.discount_created_at - timedelta(days=1)
+            for d in product_discounts
+            if d.discount_created_at > today
+        ]
+        discount = max((d.discount for d in active), default=0)
+        rows.append(
+            ProductPricing(
+                product_id=product.pk,
+                discount=discount,
+                total_price=(product.price * (100 - discount) / 100).quantize(Decimal('0.01')),
+                valid_until=min(bounds, default=None),
+            )
+        )
+    ProductPricing.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('product', '0009_product_keyset_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPricing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pricing', serialize=False, to='product.product', verbose_name='Товар')),
+                ('discount', models.SmallIntegerField(default=0, verbose_name='Действующая скидка, %')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Итоговая цена')),
+                ('valid_until', models.DateField(blank=True, db_index=True, null=True, verbose_name='Цена действует до')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Цена товара',
+                'verbose_name_plural': 'Цены товаров',
+                'indexes': [models.Index(fields=['total_price', 'product'], name='pricing_total_price_idx')],
+            },
+        ),
+        migrations.RunPython(fill_pricing, migrations.RunPython.noop),
+    ]
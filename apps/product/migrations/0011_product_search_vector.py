@@ -0,0 +1,38 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:49
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+FILL_SEARCH_VECTOR = """
+UPDATE product_product p SET search_vector =
+    setweight(to_tsvector('russian', coalesce(p.name, '') || ' ' || coalesce(p.brand, '')), 'A')
+    || setweight(to_tsvector('simple', coalesce(p.name, '') || ' ' || coalesce(p.brand, '')), 'A')
+    || setweight(to_tsvector('russian',
+        coalesce((SELECT c.name FROM product_category c WHERE c.id = p.category_id), '') || ' '
+        || coalesce((SELECT c.name FROM product_collection c WHERE c.id = p.collection_id), '')), 'B')
+    || setweight(to_tsvector('russian', coalesce((
+        SELECT string_agg(m.name, ' ') FROM product_material m
+        JOIN product_product_material pm ON pm.material_id = m.id
+        WHERE pm.product_id = p.id), '')), 'C')
+    || setweight(to_tsvector('russian', coalesce(p.description, '')), 'D');
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('product', '0010_productpricing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        migrations.RunSQL(FILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [('product', '0015_product_updated_at')]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityRefresh',
+            fields=[
+                (
+                    'product',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='similarity_refresh',
+                        serialize=False,
+                        to='product.product',
+                        verbose_name='Товар',
+                    ),
+                ),
+                ('requested_at', models.DateTimeField(auto_now=True, verbose_name='Дата запроса')),
+            ],
+            options={'verbose_name': 'Пересчёт похожих товаров', 'verbose_name_plural': 'Пересчёт похожих товаров'},
+        ),
+        migrations.CreateModel(
+            name='SimilarProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                (
+                    'product',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='similar_products',
+                        to='product.product',
+                        verbose_name='Товар',
+                    ),
+                ),
+                (
+                    'similar',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='similar_for',
+                        to='product.product',
+                        verbose_name='Похожий товар',
+                    ),
+                ),
+            ],
+            options={'verbose_name': 'Похожий товар', 'verbose_name_plural': 'Похожие товары'},
+        ),
+        migrations.AddConstraint(
+            model_name='similarproduct',
+            constraint=models.UniqueConstraint(fields=('product', 'rank'), name='unique_similar_product_rank'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [('product', '0016_similar_products')]
+
+    operations = [
+        migrations.AddField(
+            model_name='discount',
+            name='categories',
+            field=models.ManyToManyField(
+                blank=True, related_name='discounts', to='product.category', verbose_name='Категории'
+            ),
+        ),
+        migrations.AddField(
+            model_name='discount',
+            name='collections',
+            field=models.ManyToManyField(
+                blank=True, related_name='discounts', to='product.collection', verbose_name='Коллекции'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='discount',
+            name='applied_products',
+            field=models.ManyToManyField(
+                blank=True, related_name='discounts', to='product.product', verbose_name='Применяемые товары'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='discount',
+            index=models.Index(fields=['discount_end_at', 'discount_created_at'], name='discount_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discount', index=models.Index(fields=['discount_created_at'], name='discount_created_at_idx')
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:10
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def fill_missing_pricing(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    Discount = apps.get_model('product', 'Discount')
+    ProductPricing = apps.get_model('product', 'ProductPricing')
+    today = timezone.localdate()
+    by_product, by_category, by_collection = {}, {}, {}
+    for discount in Discount.objects.filter(discount_end_at__gte=today).prefetch_related(
+        'applied_products', 'categories', 'collections'
+    ):
+        for target, related in (
+            (by_product, discount.applied_products.all()),
+            (by_category, discount.categories.all()),
+            (by_collection, discount.collections.all()),
+        ):
+            for obj in related:
+                target.setdefault(obj.pk, []).append(discount)
+    rows = []
+    products = Product.objects.filter(pricing__isnull=True).only('pk', 'price', 'category_id', 'collection_id')
+    for product in products.iterator():
+        product_discounts = set(
+            by_product.get(product.pk, [])
+            + by_category.get(product.category_id, [])
+            + by_collection.get(product.collection_id, [])
+        )
+        active = [d for d in product_discounts if d.discount_created_at <= today <= d.discount_end_at]
+        bounds = [d.discount_end_at for d in active] + [
+            d.discount_created_at - timedelta(days=1)
+            for d in product_discounts
+            if d.discount_created_at > today
+        ]
+        discount = max((d.discount for d in active), default=0)
+        rows.append(
+            ProductPricing(
+                product_id=product.pk,
+                discount=discount,
+                total_price=(product.price * (100 - discount) / 100).quantize(Decimal('0.01')),
+                valid_until=min(bounds, default=None),
+            )
+        )
+    ProductPricing.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('product', '0017_discount_groups'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_missing_pricing, migrations.RunPython.noop),
+    ]
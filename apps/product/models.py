@@ -1,7 +1,11 @@
+import uuid
 from decimal import Decimal
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator
 from django.db import models
+from django.db.models.functions import Coalesce, Round
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 
@@ -17,6 +21,7 @@ class Category(models.Model):
     class Meta:
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
+        indexes = (GinIndex(fields=('name',), name='category_name_trgm_idx', opclasses=('gin_trgm_ops',)),)
 
     def __str__(self):
         return self.name
@@ -61,11 +66,13 @@ class Collection(models.Model):
     name = models.CharField(verbose_name='Коллекция', max_length=100, unique=True)
     slug = models.SlugField(verbose_name='Идентификатор URL на коллекцию', max_length=100, unique=True)
     image = models.ImageField(verbose_name='Изображение коллекции', default='products/noimage_detail.png')
+    image_variants = models.JSONField(verbose_name='Варианты изображения', default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Коллекция'
         verbose_name_plural = 'Коллекции'
         ordering = ('id',)
+        indexes = (GinIndex(fields=('name',), name='collection_name_trgm_idx', opclasses=('gin_trgm_ops',)),)
 
     def __str__(self):
         return self.name
@@ -114,6 +121,45 @@ class FurnitureDetails(models.Model):
         return ', '.join(fields) if fields else 'FurnitureDetails object'
 
 
+class ProductQuerySet(models.QuerySet):
+    """Набор запросов для товаров."""
+
+    def with_pricing(self):
+        """
+        Добавляет к товарам действующую скидку (active_discount) и итоговую цену (total_price).
+        Скидка вычисляется подзапросом в том же SQL-запросе, что и сами товары.
+        """
+        active_discount = Discount.objects.active().applicable().order_by('-discount').values('discount')
+        return self.annotate(
+            active_discount=Coalesce(models.Subquery(active_discount[:1]), 0),
+            total_price=Round(
+                models.F('price') * (100 - models.F('active_discount')) / 100,
+                2,
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+
+    def touch(self):
+        """Отмечает товары изменёнными: названия категории, коллекции, цвета и материалов выгружаются с товаром."""
+        return self.update(updated_at=timezone.now())
+
+    def with_related(self):
+        """Подгружает связанные объекты, которые выводит ProductSerializer, и цену для сортировки."""
+        return self.select_related('category', 'color', 'pricing').prefetch_related('material')
+
+    def for_fieldset(self, fields, expand):
+        """
+        Вариант with_pricing и with_related для ответа только с полями fields, где развёрнуты объекты expand:
+        скидка считается, если выводится цена, связи подгружаются, если выводятся.
+        """
+        queryset = self.select_related('pricing', *({'category', 'color'} & fields & expand))
+        if {'discount', 'total_price'} & fields:
+            queryset = queryset.with_pricing()
+        if 'material' in fields:
+            queryset = queryset.prefetch_related('material')
+        return queryset
+
+
 class Product(models.Model):
     """Модель Продуктов(Товаров) магазина"""
 
@@ -126,7 +172,10 @@ class Product(models.Model):
         verbose_name='Вес, кг', validators=[MaxValueValidator(500)], decimal_places=2, max_digits=5
     )
     color = models.ForeignKey(Color, verbose_name='Цвет', on_delete=models.CASCADE, related_name='products')
-    image = models.ImageField(verbose_name='Фотография продукта', default='products/noimage_detail.png')
+    image = models.ImageField(
+        verbose_name='Фотография продукта', upload_to='products/', default='products/noimage_detail.png'
+    )
+    image_variants = models.JSONField(verbose_name='Варианты изображения', default=dict, blank=True, editable=False)
     material = models.ManyToManyField(Material, verbose_name='материалы', related_name='products')
     furniture_details = models.ForeignKey(
         FurnitureDetails,
@@ -148,49 +197,169 @@ class Product(models.Model):
     collection = models.ForeignKey(
         Collection, verbose_name='Коллекция', on_delete=models.SET_NULL, related_name='products', blank=True, null=True
     )
+    search_vector = SearchVectorField(verbose_name='Поисковый вектор', null=True, editable=False)
+    updated_at = models.DateTimeField(verbose_name='Дата обновления', auto_now=True, db_index=True)
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
-        ordering = ('name',)
+        ordering = ('name', 'id')
+        indexes = (
+            models.Index(fields=('name', 'id'), name='product_name_id_idx'),
+            GinIndex(fields=('search_vector',), name='product_search_vector_idx'),
+            GinIndex(fields=('name',), name='product_name_trgm_idx', opclasses=('gin_trgm_ops',)),
+            GinIndex(fields=('brand',), name='product_brand_trgm_idx', opclasses=('gin_trgm_ops',)),
+        )
 
     def __str__(self):
         return f'{self.article} - {self.name}'
 
     def extract_discount(self):
-        """Возвращает скидку на продукт."""
-        now = timezone.now()
-        return (
-            self.discounts.filter(
-                models.Q(discount_created_at=now, discount_end_at__gte=now)
-                | models.Q(discount_created_at__lte=now, discount_end_at__gte=now)
-            ).aggregate(max_discount=models.Max('discount'))['max_discount']
-            or 0
-        )
+        """
+        Возвращает скидку на продукт: из аннотации with_pricing, если она есть,
+        иначе из действующей строки ProductPricing, а без неё - запросом к скидкам.
+        """
+        if hasattr(self, 'active_discount'):
+            return self.active_discount
+        if pricing := self.get_current_pricing():
+            return pricing.discount
+        discounts = Discount.objects.active().applicable(self)
+        return discounts.aggregate(max_discount=models.Max('discount'))['max_discount'] or 0
 
     def calculate_total_price(self):
         """Возвращает рассчитанную итоговую цену товара с учётом скидки."""
+        if hasattr(self, 'total_price'):
+            return self.total_price
+        if pricing := self.get_current_pricing():
+            return pricing.total_price
         discount = self.extract_discount()
-        return self.price * Decimal(1 - discount / 100)
+        return (self.price * (100 - discount) / 100).quantize(Decimal('0.01'))
+
+    def get_current_pricing(self):
+        """Строка ProductPricing, если её цена действует сегодня; None, если строки нет или она устарела."""
+        try:
+            pricing = self.pricing
+        except ProductPricing.DoesNotExist:
+            return None
+        if pricing.valid_until is not None and pricing.valid_until < timezone.localdate():
+            return None
+        return pricing
+
+
+class DiscountQuerySet(models.QuerySet):
+    """Набор запросов для скидок."""
+
+    def active(self, day=None):
+        """Скидки, действующие в указанный день (по умолчанию сегодня)."""
+        day = day or timezone.localdate()
+        return self.filter(discount_created_at__lte=day, discount_end_at__gte=day)
+
+    def applicable(self, product=None):
+        """
+        Скидки, которые применяются к товару: напрямую, на его категорию или на его коллекцию.
+        Без product - к товару внешнего запроса, для подзапросов.
+        """
+        if product is None:
+            product_id, category_id, collection_id = (
+                models.OuterRef(name) for name in ('pk', 'category_id', 'collection_id')
+            )
+        else:
+            product_id, category_id, collection_id = product.pk, product.category_id, product.collection_id
+        condition = models.Q(applied_products=product_id) | models.Q(categories=category_id)
+        if product is None or collection_id is not None:
+            condition |= models.Q(collections=collection_id)
+        return self.filter(condition)
 
 
 class Discount(models.Model):
-    """Модель скидок для товаров в магазине."""
+    """
+    Модель скидок для товаров в магазине. Скидка применяется к выбранным товарам и ко всем товарам
+    выбранных категорий и коллекций; из нескольких действующих скидок товара берётся наибольшая.
+    """
 
-    applied_products = models.ManyToManyField(Product, verbose_name='Применяемые товары', related_name='discounts')
+    applied_products = models.ManyToManyField(
+        Product, verbose_name='Применяемые товары', related_name='discounts', blank=True
+    )
+    categories = models.ManyToManyField(Category, verbose_name='Категории', related_name='discounts', blank=True)
+    collections = models.ManyToManyField(Collection, verbose_name='Коллекции', related_name='discounts', blank=True)
     discount = models.SmallIntegerField(verbose_name='Размер скидки, %', validators=[MaxValueValidator(99)], default=0)
     discount_created_at = models.DateField(verbose_name='Начало скидки', default=timezone.now)
     discount_end_at = models.DateField(verbose_name='Окончание скидки')
 
+    objects = DiscountQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Скидка'
         verbose_name_plural = 'Скидки'
         ordering = ('discount_created_at',)
+        indexes = (
+            models.Index(fields=('discount_end_at', 'discount_created_at'), name='discount_period_idx'),
+            models.Index(fields=('discount_created_at',), name='discount_created_at_idx'),
+        )
 
     def __str__(self):
         return f'{self.discount}% от {self.discount_created_at} до {self.discount_end_at}'
 
 
+class ProductPricing(models.Model):
+    """Действующая цена товара. Поддерживается pricing.refresh_pricing для фильтрации и сортировки по цене."""
+
+    product = models.OneToOneField(
+        Product, verbose_name='Товар', on_delete=models.CASCADE, primary_key=True, related_name='pricing'
+    )
+    discount = models.SmallIntegerField(verbose_name='Действующая скидка, %', default=0)
+    total_price = models.DecimalField(verbose_name='Итоговая цена', max_digits=10, decimal_places=2)
+    valid_until = models.DateField(verbose_name='Цена действует до', null=True, blank=True, db_index=True)
+    updated_at = models.DateTimeField(verbose_name='Дата обновления', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Цена товара'
+        verbose_name_plural = 'Цены товаров'
+        indexes = (models.Index(fields=('total_price', 'product'), name='pricing_total_price_idx'),)
+
+    def __str__(self):
+        return f'{self.product_id}: {self.total_price}'
+
+
+class SimilarProduct(models.Model):
+    """Похожий товар. Списки соседей товара поддерживает similarity.refresh_similar."""
+
+    product = models.ForeignKey(
+        Product, verbose_name='Товар', on_delete=models.CASCADE, related_name='similar_products'
+    )
+    similar = models.ForeignKey(
+        Product, verbose_name='Похожий товар', on_delete=models.CASCADE, related_name='similar_for'
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий товар'
+        verbose_name_plural = 'Похожие товары'
+        constraints = (models.UniqueConstraint(fields=('product', 'rank'), name='unique_similar_product_rank'),)
+
+    def __str__(self):
+        return f'{self.product_id} -> {self.similar_id}: {self.score:.3f}'
+
+
+class SimilarityRefresh(models.Model):
+    """Товар, список похожих товаров которого нужно пересчитать."""
+
+    product = models.OneToOneField(
+        Product, verbose_name='Товар', on_delete=models.CASCADE, primary_key=True, related_name='similarity_refresh'
+    )
+    requested_at = models.DateTimeField(verbose_name='Дата запроса', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Пересчёт похожих товаров'
+        verbose_name_plural = 'Пересчёт похожих товаров'
+
+    def __str__(self):
+        return f'{self.product_id}: {self.requested_at}'
+
+
 class Favorite(models.Model):
     """Модель для добавления товаров в избранное."""
 
@@ -206,6 +375,20 @@ class Favorite(models.Model):
         return f'{self.user} -> {self.product}'
 
 
+class CartModelQuerySet(models.QuerySet):
+    """Набор запросов для корзин."""
+
+    def with_items(self):
+        """
+        Подгружает содержимое корзин и товары с действующей скидкой и итоговой ценой:
+        по одному запросу на все позиции и все товары, независимо от размера корзины.
+        """
+        items = CartItem.objects.order_by('pk').prefetch_related(
+            models.Prefetch('product', queryset=Product.objects.with_pricing())
+        )
+        return self.prefetch_related(models.Prefetch('cartitems', queryset=items))
+
+
 class CartModel(models.Model):
     """Модель корзины пользователя."""
 
@@ -213,6 +396,8 @@ class CartModel(models.Model):
     created_at = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField(verbose_name='Дата обновления', auto_now=True)
 
+    objects = CartModelQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Корзина пользователя'
         verbose_name_plural = 'Корзины пользователей'
@@ -236,3 +421,22 @@ class CartItem(models.Model):
 
     def __str__(self):
         return f'{self.product.name} {self.quantity}'
+
+
+class ImageUpload(models.Model):
+    """Изображение, загружаемое по частям. Части дописываются в файл в IMAGE_UPLOAD_DIR до размера size."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, verbose_name='Пользователь', on_delete=models.CASCADE, related_name='image_uploads')
+    filename = models.CharField(verbose_name='Имя файла', max_length=255)
+    size = models.PositiveBigIntegerField(verbose_name='Размер, байт')
+    offset = models.PositiveBigIntegerField(verbose_name='Загружено, байт', default=0)
+    image = models.ImageField(verbose_name='Изображение', upload_to='products/', blank=True)
+    created_at = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Загрузка изображения'
+        verbose_name_plural = 'Загрузки изображений'
+
+    def __str__(self):
+        return f'{self.filename}: {self.offset}/{self.size}'
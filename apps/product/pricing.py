@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+from apps.product.models import Discount, Product, ProductPricing
+from common.cache import schedule_version_bump
+
+BATCH_SIZE = 1000
+
+
+def refresh_pricing(products=None):
+    """
+    Пересчитывает строки ProductPricing для товаров (по умолчанию для всех).
+    valid_until - последний день, когда цена гарантированно не изменится:
+    окончание ближайшей действующей скидки или день перед началом ближайшей будущей.
+    Возвращает количество обновлённых строк.
+    """
+    today = timezone.localdate()
+    queryset = Product.objects.all() if products is None else Product.objects.filter(pk__in=products)
+    discounts = Discount.objects.applicable()
+    queryset = (
+        queryset.with_pricing()
+        .annotate(
+            active_until=Subquery(discounts.active(today).order_by('discount_end_at').values('discount_end_at')[:1]),
+            next_start=Subquery(
+                discounts.filter(discount_created_at__gt=today)
+                .order_by('discount_created_at')
+                .values('discount_created_at')[:1]
+            ),
+        )
+        .order_by()
+        .values_list('pk', 'active_discount', 'total_price', 'active_until', 'next_start')
+    )
+
+    rows, count = [], 0
+    for pk, discount, total_price, active_until, next_start in queryset.iterator(chunk_size=BATCH_SIZE):
+        bounds = [active_until, next_start - timedelta(days=1) if next_start else None]
+        valid_until = min((bound for bound in bounds if bound), default=None)
+        rows.append(ProductPricing(product_id=pk, discount=discount, total_price=total_price, valid_until=valid_until))
+        if len(rows) >= BATCH_SIZE:
+            count += _save(rows)
+            rows = []
+    count += _save(rows)
+    if count:
+        # bulk_create не отправляет сигналы, а цены меняются и без изменения товаров - по датам скидок.
+        schedule_version_bump(ProductPricing)
+    return count
+
+
+def refresh_stale_pricing():
+    """Пересчитывает цены товаров, у которых открылось или закрылось окно скидки, и товаров без цены."""
+    today = timezone.localdate()
+    stale = ProductPricing.objects.filter(valid_until__lt=today).values_list('product_id', flat=True)
+    missing = Product.objects.filter(pricing__isnull=True).values_list('pk', flat=True)
+    return refresh_pricing(list(stale) + list(missing))
+
+
+def get_current_pricing(products):
+    """
+    Действующие скидки и итоговые цены товаров products: {id: (скидка, итоговая цена, действует до)}.
+    Читаются одним запросом из ProductPricing; строки, устаревшие до ежедневного пересчёта,
+    и товары без строки считаются запросом with_pricing (их цена гарантирована только на сегодня).
+    """
+    today = timezone.localdate()
+    rows = ProductPricing.objects.filter(product__in=products).values_list(
+        'product', 'discount', 'total_price', 'valid_until'
+    )
+    pricing = {
+        pk: (discount, total_price, valid_until)
+        for pk, discount, total_price, valid_until in rows
+        if valid_until is None or valid_until >= today
+    }
+    if missing := [pk for pk in products if pk not in pricing]:
+        rows = (
+            Product.objects.filter(pk__in=missing).with_pricing().values_list('pk', 'active_discount', 'total_price')
+        )
+        pricing.update((pk, (discount, total_price, today)) for pk, discount, total_price in rows)
+    return pricing
+
+
+def get_discount_products(discount):
+    """id товаров, к которым применяется скидка: выбранных и входящих в её категории и коллекции."""
+    condition = Q(discounts=discount) | Q(category__discounts=discount) | Q(collection__discounts=discount)
+    return list(Product.objects.filter(condition).values_list('pk', flat=True).distinct())
+
+
+def _save(rows):
+    ProductPricing.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=('product',),
+        update_fields=('discount', 'total_price', 'valid_until', 'updated_at'),
+    )
+    return len(rows)
@@ -0,0 +1,86 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+from apps.product.models import Category, Collection, Material, Product
+
+SEARCH_CONFIGS = ('russian', 'simple')
+# Источники подсказок: тип, модель, поле с триграммным индексом, поле-идентификатор.
+SUGGEST_SOURCES = (
+    ('product', Product, 'name', None),
+    ('brand', Product, 'brand', None),
+    ('category', Category, 'name', 'slug'),
+    ('collection', Collection, 'name', 'slug'),
+)
+
+
+def build_search_vector():
+    """
+    Выражение взвешенного tsvector товара.
+    Название и бренд (A) индексируются и с морфологией, и как есть (simple) - для артикулов и латиницы;
+    категория и коллекция - B, материалы - C, описание - D.
+    """
+    category = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    collection = Subquery(Collection.objects.filter(pk=OuterRef('collection_id')).values('name')[:1])
+    materials = Subquery(
+        Material.objects.filter(products=OuterRef('pk'))
+        .order_by()
+        .values('products')
+        .annotate(names=StringAgg('name', ' '))
+        .values('names')
+    )
+    vector = SearchVector('name', 'brand', config='russian', weight='A')
+    vector += SearchVector('name', 'brand', config='simple', weight='A')
+    vector += SearchVector(category, collection, config='russian', weight='B')
+    vector += SearchVector(materials, config='russian', weight='C')
+    vector += SearchVector('description', config='russian', weight='D')
+    return vector
+
+
+def update_search_vector(products=None):
+    """Пересчитывает search_vector товаров (по умолчанию всех) одним UPDATE."""
+    queryset = Product.objects.all() if products is None else Product.objects.filter(pk__in=products)
+    return queryset.update(search_vector=build_search_vector())
+
+
+def build_search_query(value):
+    """Поисковый запрос в синтаксисе веб-поиска по обеим конфигурациям."""
+    russian, simple = (SearchQuery(value, config=config, search_type='websearch') for config in SEARCH_CONFIGS)
+    return russian | simple
+
+
+def search_products(queryset, value):
+    """
+    Отбирает товары по полнотекстовому запросу и сортирует их по релевантности.
+    ts_rank возвращает real: значение в курсоре (double) не совпало бы с ним при сравнении, поэтому приводим к double.
+    """
+    query = build_search_query(value)
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(search_rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+        .order_by('-search_rank', 'id')
+    )
+
+
+def suggest(term, limit):
+    """
+    Подсказки для поиска по мере ввода: названия товаров, бренды, категории и коллекции.
+    Каждый источник - один запрос по триграммному индексу (оператор %>), устойчивый к опечаткам.
+    """
+    suggestions = []
+    for kind, model, field, slug_field in SUGGEST_SOURCES:
+        fields = (field, slug_field) if slug_field else (field,)
+        rows = (
+            model.objects.filter(**{f'{field}__trigram_word_similar': term})
+            .values(*fields)
+            .annotate(similarity=TrigramWordSimilarity(term, field))
+            .order_by('-similarity', field)
+            .distinct()[:limit]
+        )
+        suggestions.extend(
+            {'type': kind, 'text': row[field], 'slug': row.get(slug_field), 'similarity': row['similarity']}
+            for row in rows
+        )
+    suggestions.sort(key=lambda suggestion: suggestion.pop('similarity'), reverse=True)
+    return suggestions[:limit]
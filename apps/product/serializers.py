@@ -1,7 +1,54 @@
-from drf_extra_fields.fields import Base64ImageField
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.validators import validate_image_file_extension
+from django.db.models import Manager
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from apps.product.models import Category, Collection, Color, Discount, FurnitureDetails, Material, Product
+from apps.orders.together import get_bought_together_ids
+from apps.product.models import (
+    Category,
+    Collection,
+    Color,
+    Discount,
+    Favorite,
+    FurnitureDetails,
+    ImageUpload,
+    Material,
+    Product,
+)
+from common.images import VARIANT_FORMATS
+from common.serializers import SparseFieldsetMixin, get_output_fieldset
+from common.validators import validate_image_dimensions
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Уменьшенные копии изображения: миниатюра для карточек и srcset для каждого формата.
+    None, пока копии не построены.
+    """
+
+    def to_representation(self, value):
+        sizes = value.get('sizes')
+        if not sizes:
+            return None
+        request = self.context.get('request')
+        widths = sorted(sizes, key=int)
+
+        def build_url(name):
+            url = default_storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+
+        return {
+            'thumbnail': build_url(sizes[widths[0]]['jpeg']),
+            'srcset': {
+                key: ', '.join(f'{build_url(sizes[width][key])} {width}w' for width in widths)
+                for key, _, _ in VARIANT_FORMATS
+            },
+        }
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -44,13 +91,14 @@ class DiscountSerializer(serializers.ModelSerializer):
         fields = ('discount',)
 
 
-class ShortProductSerializer(serializers.ModelSerializer):
+class ShortProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериалайзер для отображения товаров."""
 
     is_favorited = serializers.SerializerMethodField(method_name='analyze_is_favorited')
     discount = serializers.SerializerMethodField(method_name='extract_discount')
     total_price = serializers.SerializerMethodField(method_name='calculate_total_price')
-    image = Base64ImageField(required=True)
+    image = serializers.ImageField(required=True, validators=[validate_image_dimensions])
+    images = ImageVariantsField(source='image_variants')
     available_quantity = serializers.SerializerMethodField(method_name='fetch_available_quantity')
 
     class Meta:
@@ -65,6 +113,7 @@ class ShortProductSerializer(serializers.ModelSerializer):
             'total_price',
             'available_quantity',
             'image',
+            'images',
         )
 
     def analyze_is_favorited(self, obj):
@@ -75,7 +124,42 @@ class ShortProductSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.favorites.filter(user=request.user).exists()
+        # Контекст общий для корневого и вложенных сериализаторов: каждый товар проверяется один раз за ответ.
+        favorites = self.context.setdefault('favorites', {})
+        if obj.pk not in favorites:
+            ids = {product.pk for product in self.get_listed_products()} - favorites.keys() | {obj.pk}
+            favorites.update(dict.fromkeys(ids, False))
+            favorite_ids = Favorite.objects.filter(user=request.user, product_id__in=ids).values_list(
+                'product_id', flat=True
+            )
+            favorites.update(dict.fromkeys(favorite_ids, True))
+        return favorites[obj.pk]
+
+    def get_listed_products(self):
+        """
+        Товары ответа, в котором выводится этот сериализатор: страница корневого ListSerializer
+        или товары, вложенные в её элементы (позиции корзины, отзывы). Избранное проверяется одним запросом
+        по их id, а не по всему избранному пользователя.
+        """
+        fields = []
+        root = self
+        while root.parent is not None:
+            fields.append(root)
+            root = root.parent
+        if root.instance is None:
+            return []
+        objects = root.instance if isinstance(root, serializers.ListSerializer) else [root.instance]
+        for field in reversed(fields):
+            if isinstance(field.parent, serializers.ListSerializer):
+                # Элемент списка: объекты уже получены из самого списка.
+                continue
+            objects = [field.get_attribute(obj) for obj in objects]
+            if isinstance(field, serializers.ListSerializer):
+                objects = [
+                    item for items in objects for item in (items.all() if isinstance(items, Manager) else items)
+                ]
+            objects = [obj for obj in objects if obj is not None]
+        return objects
 
     def extract_discount(self, obj):
         """Возвращает скидку на продукт."""
@@ -96,6 +180,7 @@ class ProductSerializer(ShortProductSerializer):
     category = CategorySerializer()
     color = ColorSerializer()
     material = MaterialSerializer(many=True)
+    expandable_fields = ('category', 'color', 'material')
 
     class Meta(ShortProductSerializer.Meta):
         fields = ShortProductSerializer.Meta.fields + (
@@ -115,12 +200,110 @@ class ProductSerializer(ShortProductSerializer):
         read_only_fields = ('category', 'material', 'purpose', 'is_favorited')
 
 
+class ProductDetailSerializer(ProductSerializer):
+    """Сериалайзер карточки товара."""
+
+    bought_together = serializers.SerializerMethodField(method_name='fetch_bought_together')
+
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ('bought_together',)
+
+    @extend_schema_field(ShortProductSerializer(many=True))
+    def fetch_bought_together(self, obj):
+        """Возвращает товары, которые часто покупают вместе с этим товаром."""
+        return serialize_short_products(get_bought_together_ids([obj.pk]), self.context)
+
+
+def serialize_short_products(ids, context):
+    """Короткие карточки товаров ids в порядке списка, одним запросом."""
+    products = Product.objects.for_fieldset(*get_output_fieldset(ShortProductSerializer, context.get('request')))
+    products = products.in_bulk(ids)
+    return ShortProductSerializer([products[pk] for pk in ids if pk in products], many=True, context=context).data
+
+
 class CollectionSerializer(serializers.ModelSerializer):
     """Сериалайзер для модели Collection."""
 
-    image = Base64ImageField()
+    image = serializers.ImageField(read_only=True)
+    images = ImageVariantsField(source='image_variants')
 
     class Meta:
         model = Collection
-        fields = ('id', 'name', 'slug', 'image')
+        fields = ('id', 'name', 'slug', 'image', 'images')
         read_only_fields = fields
+
+
+class SuggestionSerializer(serializers.Serializer):
+    """Сериалайзер подсказки для поиска."""
+
+    type = serializers.ChoiceField(choices=('product', 'brand', 'category', 'collection'))
+    text = serializers.CharField()
+    slug = serializers.SlugField(allow_null=True)
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """Сериалайзер загрузки изображения по частям."""
+
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageUpload
+        fields = ('id', 'filename', 'size', 'offset', 'chunk_size', 'image')
+        read_only_fields = ('offset', 'image')
+
+    def get_chunk_size(self, obj) -> int:
+        return settings.IMAGE_UPLOAD_CHUNK_SIZE
+
+    def validate_filename(self, value):
+        validate_image_file_extension(File(None, name=value))
+        return value
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Размер файла - до {settings.IMAGE_UPLOAD_MAX_SIZE // 1024 // 1024} МБ.'
+            )
+        return value
+
+
+class ProductImageSerializer(serializers.Serializer):
+    """Новое изображение товара: файл (multipart) или завершённая загрузка по частям."""
+
+    image = serializers.ImageField(required=False, validators=[validate_image_dimensions])
+    upload = serializers.PrimaryKeyRelatedField(queryset=ImageUpload.objects.exclude(image=''), required=False)
+
+    def validate(self, attrs):
+        if ('image' in attrs) == ('upload' in attrs):
+            raise serializers.ValidationError('Передайте либо файл image, либо идентификатор загрузки upload.')
+        return attrs
+
+
+class ProductIdsSerializer(serializers.Serializer):
+    """Список id товаров для выборки одним запросом."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=settings.PRODUCTS_BULK_MAX_IDS
+    )
+
+
+class ProductBulkSerializer(serializers.Serializer):
+    """Товары в порядке запроса и id, которых нет в каталоге."""
+
+    results = ShortProductSerializer(many=True)
+    missing = serializers.ListField(child=serializers.IntegerField())
+
+
+class ProductDiscountSerializer(serializers.Serializer):
+    """Действующая скидка и итоговая цена товара."""
+
+    product = serializers.IntegerField()
+    discount = serializers.IntegerField()
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    valid_until = serializers.DateField(allow_null=True, help_text='Последний день, когда цена точно не изменится')
+
+
+class ProductDiscountsSerializer(serializers.Serializer):
+    """Скидки товаров в порядке запроса и id, которых нет в каталоге."""
+
+    results = ProductDiscountSerializer(many=True)
+    missing = serializers.ListField(child=serializers.IntegerField())
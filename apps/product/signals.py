@@ -0,0 +1,233 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.product.models import (
+    Category,
+    Collection,
+    Color,
+    Discount,
+    Favorite,
+    FurnitureDetails,
+    Material,
+    Product,
+    ProductPricing,
+)
+from apps.product.pricing import get_discount_products, refresh_pricing
+from apps.product.search import update_search_vector
+from apps.product.similarity import FEATURE_FIELDS, mark_similar_stale
+from common.cache import track_versions
+from common.images import needs_variants, schedule_variants
+
+DiscountProduct = Discount.applied_products.through
+DiscountCategory = Discount.categories.through
+DiscountCollection = Discount.collections.through
+ProductMaterial = Product.material.through
+
+track_versions(Category, Collection, Color, FurnitureDetails, Material, Product, Discount, Favorite)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_pricing(sender, instance, raw=False, **kwargs):
+    """
+    Пересчитывает цену товара после изменения (в т.ч. поля price). Строка цены есть у каждого товара:
+    при загрузке фикстур скидки могут быть ещё не загружены, поэтому строка создаётся без скидки
+    и устаревшей, её пересчитает refresh_pricing по расписанию.
+    """
+    if not raw:
+        refresh_pricing([instance.pk])
+        return
+    ProductPricing.objects.get_or_create(
+        product_id=instance.pk,
+        defaults={'total_price': instance.price, 'valid_until': timezone.localdate() - timedelta(days=1)},
+    )
+
+
+@receiver(post_save, sender=Discount)
+def refresh_discount_pricing(sender, instance, raw=False, **kwargs):
+    """Пересчитывает цены товаров, к которым применяется изменённая скидка."""
+    if not raw:
+        refresh_pricing(get_discount_products(instance))
+
+
+@receiver(pre_delete, sender=Discount)
+def remember_discount_products(sender, instance, **kwargs):
+    instance._applied_product_ids = get_discount_products(instance)
+
+
+@receiver(post_delete, sender=Discount)
+def refresh_deleted_discount_pricing(sender, instance, **kwargs):
+    refresh_pricing(getattr(instance, '_applied_product_ids', []))
+
+
+@receiver(m2m_changed, sender=DiscountProduct)
+def refresh_applied_products_pricing(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает цены при изменении списка товаров скидки (с любой стороны связи)."""
+    if reverse:
+        # instance - товар, pk_set - скидки.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_pricing([instance.pk])
+        return
+    if action == 'pre_clear':
+        instance._applied_product_ids = list(instance.applied_products.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_pricing(getattr(instance, '_applied_product_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_pricing(pk_set)
+
+
+@receiver(post_save, sender=DiscountProduct)
+@receiver(post_delete, sender=DiscountProduct)
+def refresh_discount_product_pricing(sender, instance, raw=False, **kwargs):
+    """Строки связи меняются напрямую из инлайна DiscountInLine в админке."""
+    if not raw:
+        refresh_pricing([instance.product_id])
+
+
+@receiver(m2m_changed, sender=DiscountCategory)
+@receiver(m2m_changed, sender=DiscountCollection)
+def refresh_group_discount_pricing(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает цены товаров категорий и коллекций, на которые назначена или снята скидка."""
+    if reverse:
+        # instance - категория или коллекция, pk_set - скидки.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_pricing(instance.products.values_list('pk', flat=True))
+        return
+    group = 'category' if sender is DiscountCategory else 'collection'
+    if action == 'pre_clear':
+        products = Product.objects.filter(**{f'{group}__discounts': instance})
+        instance._group_product_ids = list(products.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_pricing(getattr(instance, '_group_product_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_pricing(Product.objects.filter(**{f'{group}__in': pk_set}).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Collection)
+def refresh_deleted_group_pricing(sender, instance, **kwargs):
+    """Связи со скидками удалённой категории или коллекции удаляются каскадом, без m2m_changed."""
+    refresh_pricing(getattr(instance, '_product_ids', []))
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_vector([instance.pk])
+
+
+def update_related_products(products):
+    """
+    Названия категорий, коллекций и материалов входят в поисковый вектор товара и в выгрузку каталога:
+    пересчитывает вектор и отмечает товары изменёнными для выгрузки с updated_since.
+    """
+    products = list(products)
+    update_search_vector(products)
+    Product.objects.filter(pk__in=products).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Collection)
+@receiver(post_save, sender=Material)
+def update_related_search_vector(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        update_related_products(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Color)
+def touch_color_products(sender, instance, raw=False, created=False, **kwargs):
+    """Цвет не входит в поисковый вектор, но его название выгружается с товаром."""
+    if not raw and not created:
+        instance.products.touch()
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Collection)
+@receiver(pre_delete, sender=Material)
+def remember_related_products(sender, instance, **kwargs):
+    instance._product_ids = list(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Collection)
+@receiver(post_delete, sender=Material)
+def update_deleted_related_search_vector(sender, instance, **kwargs):
+    update_related_products(getattr(instance, '_product_ids', []))
+
+
+@receiver(m2m_changed, sender=ProductMaterial)
+def update_materials_search_vector(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # instance - товар, pk_set - материалы.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_related_products([instance.pk])
+        return
+    if action == 'pre_clear':
+        instance._product_ids = list(instance.products.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        update_related_products(getattr(instance, '_product_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        update_related_products(pk_set)
+
+
+@receiver(post_save, sender=ProductMaterial)
+@receiver(post_delete, sender=ProductMaterial)
+def update_product_material_search_vector(sender, instance, raw=False, **kwargs):
+    """Строки связи меняются напрямую из инлайна ProductMaterialInLine в админке."""
+    if not raw:
+        update_related_products([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Collection)
+def build_image_variants(sender, instance, raw=False, **kwargs):
+    """Строит уменьшенные копии нового изображения в фоне."""
+    if not raw and needs_variants(instance):
+        schedule_variants(instance)
+
+
+@receiver(post_save, sender=Product)
+def mark_product_similar_stale(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Похожие товары пересчитываются, только если изменились поля, из которых строятся признаки."""
+    if not raw and (update_fields is None or FEATURE_FIELDS & update_fields):
+        mark_similar_stale([instance.pk])
+
+
+@receiver(post_save, sender=FurnitureDetails)
+def mark_details_similar_stale(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        mark_similar_stale(instance.products.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Product)
+def mark_neighbors_similar_stale(sender, instance, **kwargs):
+    """
+    Место удалённого товара в списках соседей должен занять другой товар. Очередь пополняется после
+    фиксации транзакции: соседи могут удаляться вместе с товаром, например при удалении категории.
+    """
+    products = list(instance.similar_for.values_list('product', flat=True))
+    if products:
+        transaction.on_commit(
+            lambda: mark_similar_stale(Product.objects.filter(pk__in=products).values_list('pk', flat=True))
+        )
+
+
+@receiver(m2m_changed, sender=ProductMaterial)
+def mark_materials_similar_stale(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # instance - товар, pk_set - материалы.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            mark_similar_stale([instance.pk])
+    elif action == 'pre_clear':
+        mark_similar_stale(instance.products.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        mark_similar_stale(pk_set)
+
+
+@receiver(post_save, sender=ProductMaterial)
+@receiver(post_delete, sender=ProductMaterial)
+def mark_product_material_similar_stale(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_similar_stale([instance.product_id])
@@ -0,0 +1,224 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from apps.product.models import Product, SimilarityRefresh, SimilarProduct
+from common.cache import schedule_version_bump
+
+# Товаров в одной матрице сходства: матрица занимает BATCH_SIZE x количество товаров float32.
+BATCH_SIZE = 256
+# Категориальные признаки: поле товара - вклад совпадения значений в скалярное произведение векторов.
+CATEGORICAL_FEATURES = {
+    'category': 4.0,
+    'furniture_details__furniture_type': 2.0,
+    'furniture_details__purpose': 1.5,
+    'collection': 1.5,
+    'color': 1.0,
+    'brand': 1.0,
+    'furniture_details__construction': 1.0,
+    'furniture_details__swing_mechanism': 0.5,
+    'furniture_details__armrest_adjustment': 0.5,
+    'country': 0.5,
+}
+# Ценовой диапазон - диапазон фасета цены по цене без скидки: скидки временные и не меняют сам товар.
+PRICE_BAND_WEIGHT = 1.5
+MATERIALS_WEIGHT = 1.5
+# Размеры и вес сравниваются в логарифмической шкале после стандартизации, отклонения обрезаются до NUMERIC_CLIP.
+# Среднее и разброс считаются по каталогу, поэтому незатронутые при инкрементальном пересчёте списки
+# немного отстают от них; полный пересчёт (refresh_similar_products --all) стоит запускать раз в сутки.
+NUMERIC_FEATURES = ('width', 'height', 'length', 'weight')
+NUMERIC_WEIGHT = 1.5
+NUMERIC_CLIP = 2.0
+# Поля товара, от которых зависят признаки.
+FEATURE_FIELDS = frozenset(
+    {'price', 'furniture_details', *NUMERIC_FEATURES} | {name for name in CATEGORICAL_FEATURES if '__' not in name}
+)
+
+
+class ProductFeatures:
+    """
+    Векторы признаков всех товаров каталога; сходство товаров - косинус угла между векторами.
+    Категориальный признак - one-hot вектор с весом: скалярное произведение таких векторов равно весу
+    при совпадении значений. Поэтому вместо разреженной матрицы хранятся коды значений (-1 - значения нет),
+    а совпадения считаются сравнением кодов. Материалы - multi-hot вектор, размеры и вес - плотный вектор.
+    """
+
+    def __init__(self, ids, codes, weights, materials, numeric):
+        self.ids = ids
+        self.codes = codes
+        self.weights = weights
+        self.materials = materials
+        self.numeric = numeric
+        norms = np.sqrt((codes >= 0).T @ weights + (materials**2).sum(axis=1) + (numeric**2).sum(axis=1))
+        norms[norms == 0] = 1
+        self.norms = norms.astype(np.float32)
+        self.positions = {pk: position for position, pk in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def scores(self, rows):
+        """Матрица сходства товаров с позициями rows со всеми товарами; сходство товара с собой - -inf."""
+        scores = self.materials[rows] @ self.materials.T
+        scores += self.numeric[rows] @ self.numeric.T
+        for codes, weight in zip(self.codes, self.weights):
+            row_codes = codes[rows, None]
+            scores += weight * ((row_codes == codes) & (row_codes >= 0))
+        scores /= self.norms[rows, None] * self.norms
+        scores[np.arange(len(rows)), rows] = -np.inf
+        return scores
+
+
+def build_features():
+    """Читает признаки всех товаров двумя запросами и строит ProductFeatures."""
+    fields = ('pk', 'price', *NUMERIC_FEATURES, *CATEGORICAL_FEATURES)
+    rows = Product.objects.order_by('pk').values_list(*fields)
+    pks, prices, *columns = list(zip(*rows.iterator(chunk_size=5000))) or [()] * len(fields)
+    ids = np.array(pks, dtype=np.int64)
+    numeric_count = len(NUMERIC_FEATURES)
+    codes = [_encode(column) for column in columns[numeric_count:]]
+    codes.append(np.searchsorted(settings.PRICE_FACET_BOUNDS, np.array(prices, dtype=np.float64), side='right'))
+    weights = np.array([*CATEGORICAL_FEATURES.values(), PRICE_BAND_WEIGHT], dtype=np.float32)
+    numeric = _standardize(np.log1p(np.array(columns[:numeric_count], dtype=np.float64).T))
+    return ProductFeatures(
+        ids,
+        np.array(codes, dtype=np.int32).reshape(len(weights), len(ids)),
+        weights,
+        _materials(ids),
+        numeric.reshape(len(ids), len(NUMERIC_FEATURES)).astype(np.float32),
+    )
+
+
+def _encode(values):
+    index = {}
+    return [-1 if value in (None, '') else index.setdefault(value, len(index)) for value in values]
+
+
+def _standardize(values):
+    if not len(values):
+        return values
+    deviation = values.std(axis=0)
+    deviation[deviation == 0] = 1
+    values = np.clip((values - values.mean(axis=0)) / deviation, -NUMERIC_CLIP, NUMERIC_CLIP)
+    # Наибольший вклад размеров в скалярное произведение - NUMERIC_WEIGHT, как у совпадения признака.
+    return values * np.sqrt(NUMERIC_WEIGHT / (len(NUMERIC_FEATURES) * NUMERIC_CLIP**2))
+
+
+def _materials(ids):
+    """Multi-hot векторы материалов; у товара со всеми совпавшими материалами вклад - MATERIALS_WEIGHT."""
+    positions = {pk: position for position, pk in enumerate(ids.tolist())}
+    links = Product.material.through.objects.values_list('product_id', 'material_id')
+    columns, rows, cols = {}, [], []
+    for product_id, material_id in links.iterator(chunk_size=5000):
+        rows.append(positions[product_id])
+        cols.append(columns.setdefault(material_id, len(columns)))
+    matrix = np.zeros((len(ids), len(columns)), dtype=np.float32)
+    matrix[rows, cols] = 1
+    counts = matrix.sum(axis=1, keepdims=True)
+    return matrix * np.sqrt(MATERIALS_WEIGHT / np.maximum(counts, 1))
+
+
+def find_neighbors(features, rows, count):
+    """Позиции и сходство count ближайших соседей товаров с позициями rows, по убыванию сходства."""
+    scores = features.scores(rows)
+    top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def get_affected(features, products, count):
+    """
+    Товары, списки соседей которых могут измениться из-за изменения или удаления товаров products:
+    сами товары, товары, в списках которых они есть, и товары, к которым они ближе последнего соседа.
+    """
+    affected = set(SimilarProduct.objects.filter(similar__in=products).values_list('product', flat=True))
+    changed = np.array([features.positions[pk] for pk in products if pk in features.positions], dtype=np.int64)
+    affected.update(features.ids[changed].tolist())
+    if not len(changed):
+        return affected
+    # В неполный список соседей попадает любой товар.
+    thresholds = np.full(len(features), -np.inf, dtype=np.float32)
+    lists = (
+        SimilarProduct.objects.values('product')
+        .annotate(neighbors=Count('pk'), last_score=Min('score'))
+        .filter(neighbors__gte=count)
+        .values_list('product', 'last_score')
+    )
+    for pk, last_score in lists.iterator(chunk_size=5000):
+        if pk in features.positions:
+            thresholds[features.positions[pk]] = last_score
+    for batch in _batches(changed):
+        # Матрица сходства симметрична: строки изменённых товаров - это их сходство со всеми товарами.
+        closest = features.scores(batch).max(axis=0)
+        affected.update(features.ids[closest > thresholds].tolist())
+    return affected
+
+
+def refresh_similar(products=None):
+    """
+    Пересчитывает списки похожих товаров: всех товаров (по умолчанию) или только тех,
+    на которые влияет изменение товаров products. Возвращает количество пересчитанных списков.
+    """
+    count = settings.SIMILAR_PRODUCTS_COUNT
+    features = build_features()
+    if products is None:
+        targets = np.arange(len(features))
+    else:
+        affected = get_affected(features, products, count)
+        targets = np.array(sorted(features.positions[pk] for pk in affected if pk in features.positions))
+    count = min(count, len(features) - 1)
+    for batch in _batches(targets.astype(np.int64)):
+        product_ids = features.ids[batch].tolist()
+        rows = []
+        if count > 0:
+            neighbors, scores = find_neighbors(features, batch, count)
+            for pk, similar_ids, similar_scores in zip(product_ids, features.ids[neighbors].tolist(), scores.tolist()):
+                rows.extend(
+                    SimilarProduct(product_id=pk, similar_id=similar_id, rank=rank, score=score)
+                    for rank, (similar_id, score) in enumerate(zip(similar_ids, similar_scores), 1)
+                )
+        with transaction.atomic():
+            SimilarProduct.objects.filter(product__in=product_ids).delete()
+            SimilarProduct.objects.bulk_create(rows)
+    if len(targets):
+        schedule_version_bump(SimilarProduct)
+    return len(targets)
+
+
+def _batches(positions):
+    for start in range(0, len(positions), BATCH_SIZE):
+        stop = start + BATCH_SIZE
+        yield positions[start:stop]
+
+
+def mark_similar_stale(products):
+    """Ставит товары в очередь пересчёта похожих товаров, которую обрабатывает refresh_queued_similar."""
+    SimilarityRefresh.objects.bulk_create(
+        [SimilarityRefresh(product_id=pk) for pk in products],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=('product',),
+        update_fields=('requested_at',),
+    )
+
+
+def refresh_queued_similar(rebuild=False):
+    """
+    Пересчитывает списки, на которые влияют товары из очереди (при rebuild - все списки),
+    и убирает товары из очереди, если их не поставили в неё снова за время пересчёта.
+    Возвращает количество пересчитанных списков.
+    """
+    queued = SimilarityRefresh.objects.filter(requested_at__lte=timezone.now())
+    if rebuild:
+        count = refresh_similar()
+    else:
+        products = list(queued.values_list('product', flat=True))
+        if not products:
+            return 0
+        count = refresh_similar(products)
+        queued = queued.filter(product__in=products)
+    queued.delete()
+    return count
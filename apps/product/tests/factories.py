@@ -0,0 +1,68 @@
+import datetime
+
+import factory
+from django.utils import timezone
+from factory.django import DjangoModelFactory
+
+from apps.product.models import Category, Collection, Color, Discount, Material, Product
+
+
+class CategoryFactory(DjangoModelFactory):
+    name = factory.Sequence(lambda n: f'Категория {n}')
+    slug = factory.Sequence(lambda n: f'category-{n}')
+
+    class Meta:
+        model = Category
+
+
+class ColorFactory(DjangoModelFactory):
+    name = factory.Sequence(lambda n: f'Цвет {n}')
+
+    class Meta:
+        model = Color
+
+
+class MaterialFactory(DjangoModelFactory):
+    name = factory.Sequence(lambda n: f'Материал {n}')
+
+    class Meta:
+        model = Material
+
+
+class CollectionFactory(DjangoModelFactory):
+    name = factory.Sequence(lambda n: f'Коллекция {n}')
+    slug = factory.Sequence(lambda n: f'collection-{n}')
+
+    class Meta:
+        model = Collection
+
+
+class ProductFactory(DjangoModelFactory):
+    article = factory.Sequence(lambda n: 100000 + n)
+    name = factory.Sequence(lambda n: f'Товар {n}')
+    width = 120
+    height = 80
+    length = 60
+    weight = 25
+    color = factory.SubFactory(ColorFactory)
+    category = factory.SubFactory(CategoryFactory)
+    country = 'Россия'
+    brand = 'Бренд'
+    price = factory.Sequence(lambda n: 1000 + n * 100)
+
+    class Meta:
+        model = Product
+
+    @factory.post_generation
+    def material(self, create, extracted, **kwargs):
+        if create and extracted:
+            self.material.set(extracted)
+
+
+class DiscountFactory(DjangoModelFactory):
+    discount = 10
+    discount_created_at = factory.LazyFunction(timezone.localdate)
+    discount_end_at = factory.LazyFunction(lambda: timezone.localdate() + datetime.timedelta(days=7))
+
+    class Meta:
+        model = Discount
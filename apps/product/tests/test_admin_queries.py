@@ -0,0 +1,65 @@
+import pytest
+from django.contrib import admin
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from apps.jobs.models import Job
+from apps.orders.models import Delivery, DeliveryType, Order, OrderProduct, Storehouse
+from apps.product.models import CartItem, CartModel, Favorite, FurnitureDetails, Product
+from apps.product.tests.factories import CollectionFactory, DiscountFactory, MaterialFactory, ProductFactory
+from apps.reviews.models import Review
+from apps.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+ROWS = 5
+
+
+@pytest.fixture
+def admin_data():
+    """По ROWS строк во всех моделях админки со связанными объектами, которые выводятся в списках."""
+    users = UserFactory.create_batch(ROWS)
+    delivery_type = DeliveryType.objects.create(name='Курьер')
+    for index, user in enumerate(users):
+        details = FurnitureDetails.objects.create(purpose=f'Назначение {index}')
+        product = ProductFactory(
+            collection=CollectionFactory(), furniture_details=details, material=[MaterialFactory()]
+        )
+        Storehouse.objects.create(product=product, quantity=index)
+        Favorite.objects.create(user=user, product=product)
+        CartItem.objects.create(cart=CartModel.objects.create(user=user), product=product)
+        Review.objects.create(user=user, product=product, rating=5)
+        delivery = Delivery.objects.create(address=f'Адрес {index}', phone='+79990000000', type_delivery=delivery_type)
+        OrderProduct.objects.create(order=Order.objects.create(user=user, delivery=delivery), product=product)
+        DiscountFactory().applied_products.add(product)
+        Token.objects.create(user=user)
+        Job.objects.create(
+            kind=Job.Kind.EXPORT, content_type=ContentType.objects.get_for_model(Product), user=user, file_format='csv'
+        )
+
+
+# SAVEPOINT и RELEASE SAVEPOINT транзакции запроса, сессия и пользователь, два подсчёта строк (оценка по pg_class
+# или COUNT для пагинатора и общий COUNT) и страница списка. Связанные объекты списка - в том же запросе.
+BASE_QUERIES = 7
+# Дополнительные запросы фильтров list_filter: значения полей и варианты связанных моделей.
+FILTER_QUERIES = {
+    'jobs.Job': 1,
+    'orders.Delivery': 1,
+    'orders.DeliveryType': 1,
+    'orders.Order': 1,
+    'product.Color': 1,
+    'product.Discount': 1,
+    'product.FurnitureDetails': 5,
+    'product.Product': 2,
+}
+
+
+@pytest.mark.parametrize(
+    'model', sorted(admin.site._registry, key=lambda model: model._meta.label), ids=lambda model: model._meta.label
+)
+def test_changelist_queries(admin_client, admin_data, django_assert_max_num_queries, model):
+    opts = model._meta
+    with django_assert_max_num_queries(BASE_QUERIES + FILTER_QUERIES.get(opts.label, 0)):
+        response = admin_client.get(reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'))
+    assert response.status_code == 200
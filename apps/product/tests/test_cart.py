@@ -0,0 +1,56 @@
+import pytest
+from django.urls import reverse
+
+from apps.product.models import CartItem, CartModel
+from apps.product.tests.factories import DiscountFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+TOTALS = {'total_quantity': 3, 'total_price': 4000, 'total_discount_price': 3400, 'total_weight': 75}
+
+
+@pytest.fixture
+def products():
+    products = [ProductFactory(price=1000), ProductFactory(price=1500)]
+    DiscountFactory(discount=20).applied_products.add(products[1])
+    return products
+
+
+def get_totals(data):
+    return {field: data[field] for field in TOTALS}
+
+
+def test_user_cart_totals(api_client, user, products):
+    cart = CartModel.objects.create(user=user)
+    CartItem.objects.bulk_create(
+        [CartItem(cart=cart, product=products[0], quantity=1), CartItem(cart=cart, product=products[1], quantity=2)]
+    )
+    api_client.force_authenticate(user)
+    assert get_totals(api_client.get(reverse('api:items')).data) == TOTALS
+
+
+def test_session_cart_totals(api_client, products):
+    for product, quantity in zip(products, (1, 2)):
+        api_client.post(reverse('api:add_item'), {'product': product.pk, 'quantity': quantity})
+    assert get_totals(api_client.get(reverse('api:items')).data) == TOTALS
+
+
+# SAVEPOINT и RELEASE SAVEPOINT транзакции запроса (ATOMIC_REQUESTS) и id товаров, которые покупают вместе.
+# Корзина пользователя: корзина, позиции, товары со скидками одним prefetch и избранное пользователя.
+# Корзина в сессии: сессия и товары одним запросом.
+@pytest.mark.parametrize('size', [1, 30])
+@pytest.mark.parametrize('authenticated, queries', [(True, 7), (False, 5)])
+def test_cart_queries(api_client, user, django_assert_num_queries, size, authenticated, queries):
+    products = ProductFactory.create_batch(size)
+    DiscountFactory(discount=20).applied_products.set(products[::2])
+    if authenticated:
+        cart = CartModel.objects.create(user=user)
+        CartItem.objects.bulk_create(CartItem(cart=cart, product=product, quantity=1) for product in products)
+        api_client.force_authenticate(user)
+    else:
+        for product in products:
+            api_client.post(reverse('api:add_item'), {'product': product.pk, 'quantity': 1})
+    with django_assert_num_queries(queries):
+        response = api_client.get(reverse('api:items'))
+    assert response.status_code == 200
+    assert response.data['total_quantity'] == size
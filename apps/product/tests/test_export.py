@@ -0,0 +1,56 @@
+import datetime
+
+import orjson
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.product.models import ProductPricing
+from apps.product.tests.factories import CollectionFactory, MaterialFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def export(api_client, **params):
+    response = api_client.get(reverse('api:products-export'), {'output': 'jsonl', **params})
+    assert response.status_code == 200
+    return [orjson.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+
+@pytest.mark.parametrize('change', ['category', 'collection', 'color', 'material', 'material_name'])
+def test_updated_since_includes_related_changes(api_client, change):
+    material = MaterialFactory()
+    changed = ProductFactory(collection=CollectionFactory(), material=[material])
+    ProductFactory(collection=CollectionFactory(), material=[MaterialFactory()])
+    since = timezone.now()
+    if change == 'material':
+        changed.material.add(MaterialFactory())
+    elif change == 'material_name':
+        material.name = 'Новое название'
+        material.save()
+    else:
+        related = getattr(changed, change)
+        related.name = 'Новое название'
+        related.save()
+    assert [row['id'] for row in export(api_client, updated_since=since.isoformat())] == [changed.pk]
+
+
+def test_export_ignores_expired_pricing(api_client):
+    product = ProductFactory(price=1000)
+    yesterday = timezone.localdate() - datetime.timedelta(days=1)
+    ProductPricing.objects.filter(product=product).update(discount=50, total_price=500, valid_until=yesterday)
+    [row] = export(api_client)
+    assert (row['discount'], row['total_price']) == (0, 1000)
+
+
+def test_export_streams_asynchronously_under_asgi():
+    products = ProductFactory.create_batch(3)
+
+    async def fetch():
+        response = await AsyncClient().get(reverse('api:products-export'), {'output': 'jsonl'})
+        assert response.is_async
+        return [orjson.loads(line) async for line in response.streaming_content]
+
+    assert [row['id'] for row in async_to_sync(fetch)()] == [product.pk for product in products]
@@ -0,0 +1,89 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.orders.models import BoughtTogether
+from apps.product.models import Favorite
+from apps.product.tests.factories import (
+    CategoryFactory,
+    CollectionFactory,
+    DiscountFactory,
+    MaterialFactory,
+    ProductFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+PAGE_SIZE = 10
+
+
+@pytest.fixture
+def catalog(user):
+    """Товары с материалами, коллекцией, скидками, избранным и товарами, которые покупают вместе."""
+    categories = CategoryFactory.create_batch(2)
+    collection = CollectionFactory()
+    materials = MaterialFactory.create_batch(3)
+    products = [
+        ProductFactory(
+            category=categories[index % 2], collection=collection if index % 3 else None, material=materials
+        )
+        for index in range(PAGE_SIZE + 2)
+    ]
+    DiscountFactory(discount=15).applied_products.set(products[:3])
+    DiscountFactory(discount=20).categories.add(categories[1])
+    DiscountFactory(discount=5).collections.add(collection)
+    Favorite.objects.create(user=user, product=products[0])
+    BoughtTogether.objects.bulk_create(
+        BoughtTogether(product=products[0], partner=partner, rank=rank, orders=5, confidence=0.5, lift=2)
+        for rank, partner in enumerate(products[1:4], 1)
+    )
+    return products
+
+
+# В каждом ответе SAVEPOINT и RELEASE SAVEPOINT транзакции запроса (ATOMIC_REQUESTS), товары одним запросом
+# со скидкой и ценой, материалы одним prefetch и избранное пользователя, если выводится is_favorited.
+@pytest.mark.parametrize('page_size', [1, PAGE_SIZE])
+@pytest.mark.parametrize(
+    'authenticated, params, queries',
+    [
+        (False, {}, 4),
+        (True, {}, 5),
+        (False, {'expand': 'category,color,material'}, 4),
+        (True, {'expand': 'category,color,material'}, 5),
+        (True, {'fields': 'id,name,total_price'}, 3),
+    ],
+)
+def test_product_list_queries(
+    api_client, user, catalog, django_assert_num_queries, page_size, authenticated, params, queries
+):
+    if authenticated:
+        api_client.force_authenticate(user)
+    with django_assert_num_queries(queries):
+        response = api_client.get(reverse('api:products-list'), {'page_size': page_size, **params})
+    assert response.status_code == 200
+    assert len(response.data['results']) == page_size
+
+
+# Карточка дополнительно читает id товаров, которые покупают вместе, и их короткие карточки;
+# избранное проверяется отдельно для карточки и для этих товаров.
+@pytest.mark.parametrize('authenticated, queries', [(False, 6), (True, 8)])
+def test_product_detail_queries(api_client, user, catalog, django_assert_num_queries, authenticated, queries):
+    if authenticated:
+        api_client.force_authenticate(user)
+    with django_assert_num_queries(queries):
+        response = api_client.get(reverse('api:products-detail', args=(catalog[0].pk,)))
+    assert response.status_code == 200
+    assert len(response.data['bought_together']) == 3
+
+
+def test_is_favorited_checks_listed_products_only(api_client, user, catalog):
+    api_client.force_authenticate(user)
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(reverse('api:products-list'), {'page_size': 2, 'fields': 'id,is_favorited'})
+    results = {item['id']: item['is_favorited'] for item in response.data['results']}
+    assert results == {pk: pk == catalog[0].pk for pk in results}
+    [sql] = [query['sql'] for query in context.captured_queries if 'product_favorite' in query['sql']]
+    assert re.search(r'"product_favorite"\."product_id" IN \(\d+, \d+\)', sql)
@@ -0,0 +1,22 @@
+import pytest
+from django.urls import reverse
+
+from apps.product.tests.factories import CategoryFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('page_size', [1, 2])
+def test_search_pages_through_tied_ranks(api_client, page_size):
+    category = CategoryFactory()
+    tied = ProductFactory.create_batch(3, name='Диван угловой', category=category)
+    others = ProductFactory.create_batch(2, description='Подойдёт к дивану', category=category)
+    url, params, seen = reverse('api:products-list'), {'q': 'диван', 'page_size': page_size, 'fields': 'id'}, []
+    for _ in range(len(tied) + len(others) + 1):
+        response = api_client.get(url, params)
+        assert response.status_code == 200
+        seen.extend(item['id'] for item in response.data['results'])
+        if not response.data['next']:
+            break
+        url, params = response.data['next'], None
+    assert seen == [product.pk for product in tied + others]
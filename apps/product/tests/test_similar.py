@@ -0,0 +1,27 @@
+import pytest
+from django.urls import reverse
+
+from apps.product.models import SimilarProduct
+from apps.product.tests.factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_similar_products_in_rank_order(api_client):
+    product, *similar = ProductFactory.create_batch(3)
+    SimilarProduct.objects.bulk_create(
+        SimilarProduct(product=product, similar=other, rank=rank, score=1 / rank)
+        for rank, other in enumerate(reversed(similar), 1)
+    )
+    response = api_client.get(reverse('api:products-similar', args=[product.pk]), {'fields': 'id'})
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data] == [other.pk for other in reversed(similar)]
+
+
+@pytest.mark.parametrize(
+    'method, path',
+    [('get', '/api/products/abc/similar/'), ('post', '/api/products/abc/favorite/'), ('get', '/api/products/abc/')],
+)
+def test_non_numeric_product_id_is_not_found(api_client, user, method, path):
+    api_client.force_authenticate(user)
+    assert getattr(api_client, method)(path).status_code == 404
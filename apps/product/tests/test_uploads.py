@@ -0,0 +1,52 @@
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from apps.product.models import Product
+from apps.product.tests.factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+ORIGIN = 'https://shop.example.com'
+
+
+def test_chunk_preflight_allows_upload_offset(api_client):
+    response = api_client.options(
+        reverse('api:image_uploads-chunk', args=[1]),
+        HTTP_ORIGIN=ORIGIN,
+        HTTP_ACCESS_CONTROL_REQUEST_METHOD='PUT',
+        HTTP_ACCESS_CONTROL_REQUEST_HEADERS='authorization, content-type, upload-offset',
+    )
+    assert response.status_code == 200
+    assert response['Access-Control-Allow-Origin'] == ORIGIN
+    assert 'PUT' in response['Access-Control-Allow-Methods']
+    assert 'upload-offset' in response['Access-Control-Allow-Headers'].split(', ')
+
+
+def test_upload_offset_is_exposed(api_client):
+    response = api_client.get(reverse('api:colors-list'), HTTP_ORIGIN=ORIGIN)
+    assert response['Access-Control-Expose-Headers'] == 'Upload-Offset'
+
+
+def test_generate_image_variants_updates_in_bulk(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    products = ProductFactory.create_batch(3)
+    for index, product in enumerate(products):
+        buffer = io.BytesIO()
+        Image.new('RGB', (200, 100), (index * 100, 0, 0)).save(buffer, 'PNG')
+        product.image = default_storage.save(f'products/{index}.png', ContentFile(buffer.getvalue()))
+    Product.objects.bulk_update(products, ['image'])
+    with CaptureQueriesContext(connection) as context:
+        call_command('generate_image_variants', workers=1, stdout=io.StringIO())
+    updates = [query for query in context.captured_queries if query['sql'].startswith('UPDATE "product_product"')]
+    assert len(updates) == 1
+    for product in products:
+        product.refresh_from_db()
+        assert product.image_variants['source'] == product.image.name
@@ -0,0 +1,73 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.utils import timezone
+from PIL import Image
+
+from apps.product.models import ImageUpload
+from common.validators import validate_image_dimensions
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+def get_partial_path(upload):
+    return os.path.join(settings.IMAGE_UPLOAD_DIR, f'{upload.pk}.part')
+
+
+def write_chunk(upload, stream, length):
+    """
+    Записывает часть длиной length из потока запроса с позиции upload.offset блоками по COPY_BUFFER_SIZE.
+    Оборванная часть не сдвигает offset, клиент повторяет её с той же позиции.
+    Возвращает True, если часть получена полностью.
+    """
+    os.makedirs(settings.IMAGE_UPLOAD_DIR, exist_ok=True)
+    path = get_partial_path(upload)
+    remaining = length
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as file:
+        file.seek(upload.offset)
+        while remaining:
+            data = stream.read(min(COPY_BUFFER_SIZE, remaining))
+            if not data:
+                break
+            file.write(data)
+            remaining -= len(data)
+        file.truncate()
+    if remaining:
+        return False
+    upload.offset += length
+    return True
+
+
+def complete_upload(upload):
+    """Проверяет собранный файл и переносит его в хранилище. Недогруженная часть удаляется в любом случае."""
+    path = get_partial_path(upload)
+    try:
+        with open(path, 'rb') as file:
+            validate_image_dimensions(file)
+            try:
+                with Image.open(file) as image:
+                    image.verify()
+            except Exception:
+                raise ValidationError('Загрузите корректное изображение.')
+            file.seek(0)
+            upload.image.save(os.path.basename(upload.filename), File(file), save=False)
+    finally:
+        os.remove(path)
+
+
+def clear_expired_uploads():
+    """Удаляет незавершённые загрузки старше IMAGE_UPLOAD_EXPIRE_HOURS. Возвращает их количество."""
+    expired = ImageUpload.objects.filter(
+        image='', created_at__lt=timezone.now() - timedelta(hours=settings.IMAGE_UPLOAD_EXPIRE_HOURS)
+    )
+    count = 0
+    for upload in expired.iterator():
+        path = get_partial_path(upload)
+        if os.path.exists(path):
+            os.remove(path)
+        upload.delete()
+        count += 1
+    return count
@@ -1,70 +1,196 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
+from rest_framework.mixins import CreateModelMixin, DestroyModelMixin, RetrieveModelMixin
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from rest_framework.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT
+from rest_framework.viewsets import GenericViewSet, ModelViewSet, ReadOnlyModelViewSet
 
+from apps.orders.models import BoughtTogether, Storehouse
+from apps.orders.sales import SALES_PERIODS, get_top_sales
+from apps.product.export import EXPORT_FORMATS, aiterate, export_rows, get_export_queryset, parse_updated_since
+from apps.product.facets import compute_facets, get_cache_key
 from apps.product.filters import ProductsFilter
-from apps.product.models import Category, Collection, Color, Discount, Favorite, FurnitureDetails, Material, Product
+from apps.product.models import (
+    Category,
+    Collection,
+    Color,
+    Discount,
+    Favorite,
+    FurnitureDetails,
+    ImageUpload,
+    Material,
+    Product,
+    ProductPricing,
+)
+from apps.product.pricing import get_current_pricing
+from apps.product.search import suggest
 from apps.product.serializers import (
     CategorySerializer,
     CollectionSerializer,
     ColorSerializer,
     DiscountSerializer,
     FurnitureDetailsSerializer,
+    ImageUploadSerializer,
     MaterialSerializer,
+    ProductBulkSerializer,
+    ProductDetailSerializer,
+    ProductDiscountsSerializer,
+    ProductIdsSerializer,
+    ProductImageSerializer,
     ProductSerializer,
     ShortProductSerializer,
+    SuggestionSerializer,
+)
+from apps.product.uploads import complete_upload, write_chunk
+from apps.reviews.models import Rating
+from common.cache import CachedResponseMixin, ConditionalGetMixin
+from common.serializers import SPARSE_FIELDSET_PARAMETERS, get_output_fieldset
+
+SUGGEST_MIN_LENGTH = 2
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 20
+POPULAR_TOP = 6
+POPULAR_MAX_TOP = 50
+# Модели, от которых зависят ответы со списком и карточкой товара.
+CATALOG_MODELS = (
+    Product,
+    ProductPricing,
+    Discount,
+    Storehouse,
+    Rating,
+    Category,
+    Collection,
+    Color,
+    FurnitureDetails,
+    Material,
 )
 
 
-class CategoryViewSet(ReadOnlyModelViewSet):
+class CategoryViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет для категорий товаров."""
 
     queryset = Category.objects.all()
+    cache_models = (Category,)
     serializer_class = CategorySerializer
     lookup_field = 'slug'
 
 
-class MaterialViewSet(ReadOnlyModelViewSet):
+class MaterialViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет для материалов товаров."""
 
     queryset = Material.objects.all()
+    cache_models = (Material,)
     serializer_class = MaterialSerializer
 
 
+def get_requested_ids(request):
+    """Список id без повторов из ?ids=1,2,3 или {"ids": [...]} в теле POST."""
+    if request.method == 'GET':
+        data = {'ids': [value for value in request.query_params.get('ids', '').split(',') if value.strip()]}
+    else:
+        data = request.data
+    serializer = ProductIdsSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return list(dict.fromkeys(serializer.validated_data['ids']))
+
+
 class DiscountViewSet(ReadOnlyModelViewSet):
     """Вьюсет для скидок товаров."""
 
     queryset = Discount.objects.all()
     serializer_class = DiscountSerializer
 
+    @extend_schema(
+        methods=['GET'],
+        parameters=[OpenApiParameter('ids', OpenApiTypes.STR, description='id товаров через запятую')],
+        responses=ProductDiscountsSerializer,
+    )
+    @extend_schema(methods=['POST'], request=ProductIdsSerializer, responses=ProductDiscountsSerializer)
+    @action(detail=False, methods=['get', 'post'], pagination_class=None, filter_backends=())
+    def products(self, request):
+        """
+        Возвращает действующие скидки и итоговые цены товаров по списку id (?ids=1,2,3 или {"ids": [...]}
+        в теле POST) из предрассчитанных цен ProductPricing одним запросом.
+        """
 
-class ColorViewSet(ReadOnlyModelViewSet):
+        ids = get_requested_ids(request)
+        pricing = get_current_pricing(ids)
+        fields = ('discount', 'total_price', 'valid_until')
+        results = [{'product': pk, **dict(zip(fields, pricing[pk]))} for pk in ids if pk in pricing]
+        data = {'results': results, 'missing': [pk for pk in ids if pk not in pricing]}
+        return Response(ProductDiscountsSerializer(data).data)
+
+
+class ColorViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет для цветов товаров."""
 
     queryset = Color.objects.all()
+    cache_models = (Color,)
     serializer_class = ColorSerializer
 
 
-class FurnitureDetailsViewSet(ReadOnlyModelViewSet):
+class FurnitureDetailsViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет для отображения особенностей конструкции товаров."""
 
     queryset = FurnitureDetails.objects.all()
+    cache_models = (FurnitureDetails,)
     serializer_class = FurnitureDetailsSerializer
 
 
-class ProductViewSet(ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_FIELDSET_PARAMETERS),
+)
+class ProductViewSet(ConditionalGetMixin, ModelViewSet):
     """Вьюсет для товаров."""
 
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    # Нечисловой id не доходит до запросов действий (similar, favorite, image) и сразу даёт 404.
+    lookup_value_regex = r'\d+'
     filter_backends = (DjangoFilterBackend, SearchFilter)
     filterset_class = ProductsFilter
     search_fields = ('name',)
+    # Сериалайзеры действий: по их полям и параметрам fields/expand queryset подгружает только нужное.
+    fieldset_serializers = {
+        'list': ProductSerializer,
+        'retrieve': ProductDetailSerializer,
+        'popular': ShortProductSerializer,
+        'bulk': ShortProductSerializer,
+        'similar': ShortProductSerializer,
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if serializer_class := self.fieldset_serializers.get(self.action):
+            queryset = queryset.for_fieldset(*get_output_fieldset(serializer_class, self.request))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ProductDetailSerializer
+        return super().get_serializer_class()
+
+    def get_etag_models(self):
+        models = CATALOG_MODELS
+        if self.action == 'retrieve':
+            models += (BoughtTogether,)
+        # Признак is_favorited есть только в ответах авторизованным пользователям.
+        if self.request.user.is_authenticated:
+            models += (Favorite,)
+        return models
 
     @action(detail=True, methods=['post', 'delete'], url_path='favorite')
     def favorite(self, request, pk):
@@ -77,30 +203,252 @@ class ProductViewSet(ModelViewSet):
         get_object_or_404(Favorite, user=request.user, product=product).delete()
         return Response(status=HTTP_204_NO_CONTENT)
 
-    @action(detail=False)
-    def popular(self, request, top=6):
-        """Возвращает топ популярных товаров."""
+    @extend_schema(request=ProductImageSerializer, responses=ProductSerializer)
+    @action(detail=True, methods=['put'], permission_classes=(IsAdminUser,))
+    def image(self, request, pk):
+        """
+        Заменяет изображение товара файлом из multipart-запроса (поле image)
+        или изображением завершённой загрузки по частям (поле upload).
+        """
+
+        product = self.get_object()
+        serializer = ProductImageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data.get('upload')
+        product.image = upload.image.name if upload else serializer.validated_data['image']
+        product.save(update_fields=['image'])
+        if upload:
+            upload.delete()
+        return Response(ProductSerializer(product, context=self.get_serializer_context()).data)
 
-        popular_products = (
-            Product.objects.annotate(total_quantity=Sum('order_products__quantity'))
-            .filter(total_quantity__gt=0)
-            .order_by('-total_quantity')[:top]
+    @extend_schema(
+        methods=['GET'],
+        parameters=[OpenApiParameter('ids', OpenApiTypes.STR, description='id товаров через запятую')]
+        + SPARSE_FIELDSET_PARAMETERS,
+        responses=ProductBulkSerializer,
+    )
+    @extend_schema(methods=['POST'], request=ProductIdsSerializer, responses=ProductBulkSerializer)
+    @action(detail=False, methods=['get', 'post'], pagination_class=None, filter_backends=())
+    def bulk(self, request):
+        """
+        Возвращает товары по списку id (?ids=1,2,3 или {"ids": [...]} в теле POST) одним запросом
+        в порядке списка и id, которых нет в каталоге.
+        """
+
+        ids = get_requested_ids(request)
+        products = self.get_queryset().in_bulk(ids)
+        results = ShortProductSerializer(
+            [products[pk] for pk in ids if pk in products], many=True, context=self.get_serializer_context()
         )
+        return Response({'results': results.data, 'missing': [pk for pk in ids if pk not in products]})
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('output', OpenApiTypes.STR, enum=tuple(EXPORT_FORMATS), description='Формат выгрузки'),
+            OpenApiParameter(
+                'updated_since', OpenApiTypes.DATETIME, description='Только товары, изменённые начиная с момента'
+            ),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.BINARY, (200, 'application/x-ndjson'): OpenApiTypes.BINARY},
+    )
+    @action(detail=False, pagination_class=None, filter_backends=())
+    def export(self, request):
+        """
+        Потоковая выгрузка каталога с ценами, остатками, рейтингом и материалами в CSV или JSON Lines.
+        Ответ формируется по мере чтения товаров из базы, поэтому память не зависит от размера каталога.
+        Под ASGI поток отдаётся асинхронным итератором, иначе Django собрал бы его в память целиком.
+        """
+
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f'Допустимые значения: {", ".join(EXPORT_FORMATS)}.'})
+        updated_since = None
+        if value := request.query_params.get('updated_since'):
+            try:
+                updated_since = parse_updated_since(value)
+            except ValueError:
+                raise ValidationError({'updated_since': 'Укажите дату или дату и время в формате ISO 8601.'})
+
+        stream, content_type, extension = EXPORT_FORMATS[output]
+        content = stream(export_rows(get_export_queryset(updated_since)))
+        if isinstance(request._request, ASGIRequest):
+            content = aiterate(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="products.{extension}"'
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('period', OpenApiTypes.STR, enum=tuple(SALES_PERIODS), description='Период продаж'),
+            OpenApiParameter('top', OpenApiTypes.INT, description=f'Количество товаров, до {POPULAR_MAX_TOP}'),
+        ],
+        responses=ShortProductSerializer(many=True),
+    )
+    @action(detail=False, pagination_class=None, filter_backends=())
+    def popular(self, request):
+        """Возвращает топ популярных товаров по счётчикам продаж за период (по умолчанию за всё время)."""
+
+        period = request.query_params.get('period', 'all')
+        if period not in SALES_PERIODS:
+            raise ValidationError({'period': f'Допустимые значения: {", ".join(SALES_PERIODS)}.'})
+        try:
+            top = min(int(request.query_params.get('top', POPULAR_TOP)), POPULAR_MAX_TOP)
+        except ValueError:
+            top = POPULAR_TOP
+        sales = dict(get_top_sales(period, max(top, 1)))
+        products = self.get_queryset().filter(pk__in=sales)
+        popular_products = sorted(products, key=lambda product: (-sales[product.pk], product.pk))
         serializer = ShortProductSerializer(popular_products, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'top', OpenApiTypes.INT, description=f'Количество товаров, до {settings.SIMILAR_PRODUCTS_COUNT}'
+            )
+        ]
+        + SPARSE_FIELDSET_PARAMETERS,
+        responses=ShortProductSerializer(many=True),
+    )
+    @action(detail=True, pagination_class=None, filter_backends=())
+    def similar(self, request, pk):
+        """
+        Возвращает похожие товары по убыванию сходства. Списки соседей рассчитываются заранее
+        командой refresh_similar_products, поэтому ответ - одно чтение по индексу (товар, место).
+        """
 
-class CollectionViewSet(ReadOnlyModelViewSet):
+        limit = settings.SIMILAR_PRODUCTS_COUNT
+        try:
+            top = max(min(int(request.query_params.get('top', limit)), limit), 1)
+        except ValueError:
+            top = limit
+        products = list(self.get_queryset().filter(similar_for__product=pk).order_by('similar_for__rank')[:top])
+        if not products:
+            # Пустой список - у товара ещё нет соседей или товара нет.
+            get_object_or_404(Product, pk=pk)
+        serializer = ShortProductSerializer(products, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('q', OpenApiTypes.STR, description='Начало или фрагмент поискового запроса'),
+            OpenApiParameter('limit', OpenApiTypes.INT, description=f'Количество подсказок, до {SUGGEST_MAX_LIMIT}'),
+        ],
+        responses=SuggestionSerializer(many=True),
+    )
+    @action(detail=False, pagination_class=None, filter_backends=())
+    def suggest(self, request):
+        """Возвращает подсказки для поиска по мере ввода."""
+
+        term = request.query_params.get('q', '').strip()
+        if len(term) < SUGGEST_MIN_LENGTH:
+            return Response([])
+        try:
+            limit = min(int(request.query_params.get('limit', SUGGEST_LIMIT)), SUGGEST_MAX_LIMIT)
+        except ValueError:
+            limit = SUGGEST_LIMIT
+        serializer = SuggestionSerializer(suggest(term, max(limit, 1)), many=True)
+        return Response(serializer.data)
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, pagination_class=None, filter_backends=(SearchFilter,))
+    def facets(self, request):
+        """
+        Возвращает количество товаров по значениям фильтров каталога.
+        Принимает те же параметры, что и список товаров.
+        """
+
+        filterset = ProductsFilter(request.query_params, queryset=Product.objects.all(), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        key = get_cache_key(request.query_params, request.user)
+        facets = cache.get(key)
+        if facets is None:
+            queryset = self.filter_queryset(Product.objects.all())
+            facets = compute_facets(queryset, request.query_params, request)
+            cache.set(key, facets, settings.FACETS_CACHE_TIMEOUT)
+        return Response(facets)
+
+
+@extend_schema_view(retrieve=extend_schema(parameters=SPARSE_FIELDSET_PARAMETERS))
+class CollectionViewSet(ConditionalGetMixin, CachedResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет для коллекций. Только чтение одного или списка объектов."""
 
     queryset = Collection.objects.all()
+    serializer_class = CollectionSerializer
+    cache_models = (Collection,)
+    cache_actions = ('list',)
 
-    def get_serializer_class(self):
+    def get_etag_models(self):
         if self.action == 'list':
-            return CollectionSerializer
-        return ProductSerializer
+            return self.cache_models
+        if self.request.user.is_authenticated:
+            return CATALOG_MODELS + (Favorite,)
+        return CATALOG_MODELS
 
     def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(self.retrieve_products, request, *args, **kwargs)
+
+    def retrieve_products(self, request, *args, **kwargs):
+        """
+        Коллекция и страница её товаров. Товары фильтруются параметрами списка товаров
+        и загружаются одним запросом вместе со связанными объектами.
+        """
         collection = self.get_object()
-        serializer = self.get_serializer(collection.products, many=True)
-        return Response(serializer.data)
+        products = collection.products.for_fieldset(*get_output_fieldset(ProductSerializer, request))
+        filterset = ProductsFilter(request.query_params, queryset=products, request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        page = self.paginate_queryset(filterset.qs)
+        products = ProductSerializer(page, many=True, context=self.get_serializer_context())
+        data = self.get_serializer(collection).data
+        data['products'] = self.get_paginated_response(products.data).data
+        return Response(data)
+
+
+class ImageUploadViewSet(CreateModelMixin, RetrieveModelMixin, DestroyModelMixin, GenericViewSet):
+    """
+    Загрузка больших изображений по частям с возможностью продолжения.
+    Создание возвращает id и offset; части отправляются методом PUT на chunk/ с заголовком Upload-Offset,
+    а при обрыве клиент узнаёт offset запросом загрузки и продолжает с него.
+    """
+
+    serializer_class = ImageUploadSerializer
+    permission_classes = (IsAdminUser,)
+    lookup_value_regex = r'\d+'
+
+    def get_queryset(self):
+        return ImageUpload.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(
+        request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+        parameters=[OpenApiParameter('Upload-Offset', OpenApiTypes.INT, OpenApiParameter.HEADER, required=True)],
+    )
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk):
+        """Дописывает часть файла. После получения последней части файл проверяется и сохраняется."""
+
+        upload = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': 'Укажите позицию части в заголовке Upload-Offset.'})
+        if upload.image or offset != upload.offset:
+            return Response(self.get_serializer(upload).data, status=HTTP_409_CONFLICT)
+        if not 0 < length <= settings.IMAGE_UPLOAD_CHUNK_SIZE or offset + length > upload.size:
+            raise ValidationError(
+                {'detail': f'Размер части - до {settings.IMAGE_UPLOAD_CHUNK_SIZE} байт в пределах файла.'}
+            )
+
+        if write_chunk(upload, request.stream, length) and upload.offset == upload.size:
+            try:
+                complete_upload(upload)
+            except DjangoValidationError as error:
+                upload.delete()
+                return Response({'detail': error.messages}, status=HTTP_400_BAD_REQUEST)
+        upload.save()
+        return Response(self.get_serializer(upload).data, headers={'Upload-Offset': upload.offset})
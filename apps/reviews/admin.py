@@ -1,17 +1,21 @@
 from django.contrib import admin
 
 from apps.reviews.models import Rating, Review
+from common.admin import LargeTableAdminMixin
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'user', 'product', 'rating')
-    search_fields = ('product', 'user')
-    list_filter = ('product', 'user')
+    list_select_related = ('user', 'product')
+    search_fields = ('product__name', 'user__email')
+    list_filter = ('rating',)
+    autocomplete_fields = ('user', 'product')
 
 
 @admin.register(Rating)
-class RatingAdmin(admin.ModelAdmin):
+class RatingAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'product', 'average_rating')
-    search_fields = ('product',)
-    list_filter = ('product',)
+    list_select_related = ('product',)
+    search_fields = ('product__name',)
+    autocomplete_fields = ('product',)
@@ -36,10 +36,11 @@ class Rating(models.Model):
 
     product = models.OneToOneField(Product, verbose_name='Товар', on_delete=models.CASCADE, related_name='ratings')
     average_rating = models.PositiveSmallIntegerField(verbose_name='Средний рейтинг', null=True, blank=True)
+    updated_at = models.DateTimeField(verbose_name='Дата обновления', auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Рейтинг'
         verbose_name_plural = 'Рейтинги'
 
     def __str__(self):
-        return self.product
+        return str(self.product)
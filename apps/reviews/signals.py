@@ -0,0 +1,4 @@
+from apps.reviews.models import Rating
+from common.cache import track_versions
+
+track_versions(Rating)
@@ -1,5 +1,7 @@
+from django.db.models import Prefetch
 from rest_framework.viewsets import ModelViewSet
 
+from apps.product.models import Product
 from apps.reviews.models import Review
 from apps.reviews.serializers import ReviewSerializer
 from common.permisions import IsOwner
@@ -11,3 +13,11 @@ class ReviewViewSet(ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = (IsOwner,)
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .select_related('user')
+            .prefetch_related(Prefetch('product', queryset=Product.objects.with_pricing()))
+        )
@@ -0,0 +1,14 @@
+import factory
+from factory.django import DjangoModelFactory
+
+from apps.users.models import User
+
+
+class UserFactory(DjangoModelFactory):
+    email = factory.Sequence(lambda n: f'user{n}@example.com')
+    first_name = factory.Faker('first_name')
+    password = factory.PostGenerationMethodCall('set_password', 'password')
+
+    class Meta:
+        model = User
+        django_get_or_create = ('email',)
@@ -0,0 +1,45 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+# С какого числа строк по статистике PostgreSQL список без фильтров не считает строки точно.
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор списков админки для больших таблиц. Без фильтров и поиска число строк берётся
+    из статистики PostgreSQL (pg_class.reltuples) вместо COUNT(*), который читает всю таблицу.
+    С фильтрами, на небольших таблицах и в других СУБД строки считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = get_estimated_count(queryset.model, queryset.db)
+            if estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+def get_estimated_count(model, using):
+    """Оценка числа строк таблицы модели по статистике PostgreSQL; -1, если оценки нет."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return -1
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+class LargeTableAdminMixin:
+    """
+    Списки админки для таблиц, которые растут вместе с каталогом и заказами:
+    приблизительное число строк и без отдельного COUNT(*) всей таблицы для надписи «показать все».
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
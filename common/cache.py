@@ -0,0 +1,199 @@
+import hashlib
+import time
+from datetime import datetime
+from datetime import time as dt_time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import ForeignKey
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+VERSION_KEY = 'model_version:{}'
+STATS_KEY = 'response_cache_stats:{}:{}'
+
+
+def get_model_version(model):
+    """
+    Возвращает версию данных модели - время последнего изменения в микросекундах.
+    Если версии ещё нет (или её вытеснили из кэша), она начинается с текущего момента.
+    """
+    key = VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_model_version(model):
+    """Увеличивает версию модели, делая недействительными зависящие от неё кэши."""
+    key = VERSION_KEY.format(model._meta.label_lower)
+    cache.set(key, max(time.time_ns() // 1000, (cache.get(key) or 0) + 1), None)
+
+
+def schedule_version_bump(model):
+    """
+    Увеличивает версию модели после фиксации текущей транзакции.
+    Иначе параллельный запрос мог бы закэшировать ещё не изменённые данные под новой версией.
+    """
+    transaction.on_commit(partial(bump_model_version, model))
+
+
+def track_versions(*models):
+    """Увеличивает версии моделей при сохранении, удалении и изменении их связей многие-ко-многим."""
+    for model in models:
+        uid = f'version:{model._meta.label}'
+        for signal in (post_save, post_delete):
+            signal.connect(_bump_sender_version, sender=model, weak=False, dispatch_uid=uid)
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            uid = f'version:{through._meta.label}'
+            m2m_changed.connect(_bump_m2m_version, sender=through, weak=False, dispatch_uid=uid)
+            for signal in (post_save, post_delete):
+                # Строки связи можно менять напрямую, например из инлайнов админки.
+                signal.connect(_bump_through_version, sender=through, weak=False, dispatch_uid=uid)
+
+
+def _bump_sender_version(sender, **kwargs):
+    schedule_version_bump(sender)
+
+
+def _bump_m2m_version(sender, instance, action, model, **kwargs):
+    if action.startswith('post_'):
+        schedule_version_bump(instance.__class__)
+        schedule_version_bump(model)
+
+
+def _bump_through_version(sender, **kwargs):
+    for field in sender._meta.fields:
+        if isinstance(field, ForeignKey):
+            schedule_version_bump(field.related_model)
+
+
+def get_response_cache_stats(name):
+    """Возвращает счётчики попаданий и промахов кэша ответов вьюсета."""
+    return {result: cache.get(STATS_KEY.format(name, result), 0) for result in ('hit', 'miss')}
+
+
+class CachedResponseMixin:
+    """
+    Кэширует отрендеренные тела ответов на GET-запросы к действиям cache_actions.
+    Ключ включает путь с параметрами, тип ответа и версии моделей cache_models, поэтому
+    при изменении любой из них (см. track_versions) ответы перестают находиться в кэше.
+    Заголовок X-Cache показывает результат, счётчики доступны через get_response_cache_stats.
+    Отключается настройкой RESPONSE_CACHE_ENABLED, если кэш default не общий для процессов.
+    """
+
+    cache_models = ()
+    cache_actions = ('list', 'retrieve')
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request):
+        versions = ':'.join(str(get_model_version(model)) for model in self.cache_models)
+        raw = f'{request.build_absolute_uri()}|{request.accepted_media_type}|{versions}'
+        return f'response:{self.__class__.__name__}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        # Страницы браузерного API содержат данные пользователя, их не кэшируем.
+        if (
+            not settings.RESPONSE_CACHE_ENABLED
+            or self.action not in self.cache_actions
+            or request.accepted_renderer.format == 'api'
+        ):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            self.count_cache_result('hit')
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        self.count_cache_result('miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key, (rendered.content, rendered['Content-Type']), settings.RESPONSE_CACHE_TIMEOUT
+                )
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def count_cache_result(self, result):
+        key = STATS_KEY.format(self.__class__.__name__, result)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Ключ вытеснен между add и incr.
+            pass
+
+
+class ConditionalGetMixin:
+    """
+    Добавляет ETag и Last-Modified к ответам действий etag_actions и отвечает 304 на
+    If-None-Match/If-Modified-Since, не выполняя queryset и сериализаторы.
+    Валидаторы строятся из версий моделей get_etag_models() и текущей даты: скидки
+    начинаются и заканчиваются по датам, поэтому ответы меняются и в полночь.
+    Анонимные ответы помечаются как public для кэширования на CDN, ответы
+    авторизованных пользователей - как private.
+    Как и кэш ответов, отключается настройкой RESPONSE_CACHE_ENABLED.
+    """
+
+    etag_models = ()
+    etag_actions = ('list', 'retrieve')
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_etag_models(self):
+        return self.etag_models
+
+    def get_validators(self, request):
+        """Возвращает ETag и время последнего изменения (timestamp) ответа."""
+        versions = [get_model_version(model) for model in self.get_etag_models()]
+        today = timezone.localdate()
+        user = request.user.pk if request.user.is_authenticated else ''
+        raw = f'{request.build_absolute_uri()}|{request.accepted_media_type}|{today}|{user}|{versions}'
+        midnight = timezone.make_aware(datetime.combine(today, dt_time.min)).timestamp()
+        last_modified = max([midnight] + [version / 1_000_000 for version in versions])
+        return f'"{hashlib.md5(raw.encode()).hexdigest()}"', int(last_modified)
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE_ENABLED or self.action not in self.etag_actions:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        self.patch_caching_headers(request, response)
+        return response
+
+    def patch_caching_headers(self, request, response):
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
@@ -0,0 +1,146 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import posixpath
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from common.cache import schedule_version_bump
+
+logger = logging.getLogger(__name__)
+
+# Форматы вариантов: ключ в image_variants, формат Pillow, расширение файла.
+VARIANT_FORMATS = (('webp', 'WEBP', 'webp'), ('jpeg', 'JPEG', 'jpg'))
+
+_process_pool = None
+_thread_pool = None
+
+
+def render_variants(content, widths, quality):
+    """
+    Строит уменьшенные копии изображения для каждой ширины из widths (без увеличения).
+    Выполняется в отдельном процессе, поэтому работает только с байтами и не обращается к Django.
+    Возвращает {ширина: {ключ формата: байты}}.
+    """
+    with Image.open(io.BytesIO(content)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        variants = {}
+        for width in sorted({min(width, image.width) for width in widths}):
+            resized = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+            variants[width] = {}
+            for key, image_format, _ in VARIANT_FORMATS:
+                if image_format == 'JPEG' and resized.mode == 'RGBA':
+                    background = Image.new('RGB', resized.size, 'white')
+                    background.paste(resized, mask=resized.getchannel('A'))
+                    resized = background
+                buffer = io.BytesIO()
+                resized.save(buffer, image_format, quality=quality, optimize=True)
+                variants[width][key] = buffer.getvalue()
+    return variants
+
+
+def save_variants(source, content, rendered):
+    """
+    Сохраняет варианты в хранилище под именами с хешем содержимого оригинала.
+    Одинаковые изображения (например, заглушка по умолчанию) хранятся один раз.
+    """
+    digest = hashlib.sha1(content).hexdigest()[:12]
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    sizes = {}
+    for width, formats in rendered.items():
+        sizes[str(width)] = {}
+        for key, _, extension in VARIANT_FORMATS:
+            name = posixpath.join(directory, 'variants', f'{stem}.{digest}.{width}.{extension}')
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(formats[key]))
+            sizes[str(width)][key] = name
+    return {'source': source, 'sizes': sizes}
+
+
+def build_variants(source, executor=None):
+    """Читает оригинал из хранилища, строит варианты (в executor, если передан) и сохраняет их."""
+    with default_storage.open(source, 'rb') as file:
+        content = file.read()
+    args = (content, settings.IMAGE_VARIANT_WIDTHS, settings.IMAGE_VARIANT_QUALITY)
+    rendered = executor.submit(render_variants, *args).result() if executor else render_variants(*args)
+    return save_variants(source, content, rendered)
+
+
+def update_variants(model, pk, source, variants):
+    """Записывает варианты, если изображение объекта не сменилось за время обработки."""
+    if model.objects.filter(pk=pk, image=source).update(image_variants=variants):
+        schedule_version_bump(model)
+
+
+def bulk_update_variants(model, rows):
+    """
+    Записывает варианты пачки объектов rows (pk, оригинал, варианты) одним UPDATE, пропуская объекты,
+    изображение которых сменилось за время обработки. Версию модели увеличивает вызывающий код,
+    один раз после всех пачек. Возвращает количество обновлённых объектов.
+    """
+    rows = {pk: (source, variants) for pk, source, variants in rows}
+    with transaction.atomic():
+        objects = list(model.objects.select_for_update().filter(pk__in=rows).only('pk', 'image'))
+        objects = [obj for obj in objects if obj.image.name == rows[obj.pk][0]]
+        for obj in objects:
+            obj.image_variants = rows[obj.pk][1]
+        model.objects.bulk_update(objects, ['image_variants'])
+    return len(objects)
+
+
+def needs_variants(instance):
+    return bool(instance.image) and instance.image_variants.get('source') != instance.image.name
+
+
+def get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        # spawn: дочерние процессы не наследуют потоки и соединения с БД веб-процесса.
+        _process_pool = ProcessPoolExecutor(
+            settings.IMAGE_PROCESS_WORKERS, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _process_pool
+
+
+def get_thread_pool():
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(settings.IMAGE_PROCESS_WORKERS, thread_name_prefix='image-variants')
+    return _thread_pool
+
+
+def schedule_variants(instance):
+    """
+    После фиксации транзакции строит варианты изображения объекта вне обработки запроса:
+    поток ожидает результат из пула процессов и сохраняет его.
+    При IMAGE_PROCESS_WORKERS = 0 варианты строятся сразу в текущем процессе.
+    Очередь пулов живёт в памяти веб-процесса и теряется при его перезапуске, поэтому пропущенные
+    изображения достраивает команда generate_image_variants из SCHEDULED_COMMANDS.
+    """
+    args = (instance.__class__, instance.pk, instance.image.name)
+    if settings.IMAGE_PROCESS_WORKERS:
+        transaction.on_commit(lambda: get_thread_pool().submit(_process_in_background, *args))
+    else:
+        transaction.on_commit(lambda: _process(*args))
+
+
+def _process(model, pk, source, executor=None):
+    try:
+        update_variants(model, pk, source, build_variants(source, executor))
+    except Exception:
+        logger.exception('Не удалось построить варианты изображения %s', source)
+
+
+def _process_in_background(model, pk, source):
+    try:
+        _process(model, pk, source, get_process_pool())
+    finally:
+        connections.close_all()
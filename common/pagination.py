@@ -0,0 +1,256 @@
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.sql.constants import INNER
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """Сохраняет микросекунды даты и времени: DjangoJSONEncoder обрезает их до миллисекунд."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _equal(name, value):
+    """Условие равенства значению позиции; NULL равен NULL."""
+    if value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: value})
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Пагинация по ключу (keyset) с непрозрачным курсором.
+
+    Порядок берётся из queryset (или Meta.ordering модели) и всегда дополняется
+    первичным ключом, поэтому он уникален и стабилен. Курсор хранит значения полей
+    сортировки последней (или первой) записи страницы, следующая страница выбирается
+    условием по этим значениям, а не смещением, поэтому глубокие страницы стоят
+    столько же, сколько первая. NULL в полях сортировки считается больше любого значения,
+    как в PostgreSQL: в конце при сортировке по возрастанию и в начале при сортировке по убыванию.
+    """
+
+    cursor_query_param = 'cursor'
+    cursor_query_description = 'Значение курсора для постраничной навигации.'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    page_size_query_description = 'Количество результатов на странице.'
+    max_page_size = 100
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.ordering = self.get_ordering(queryset)
+        position, self.reverse = self.decode_cursor(request)
+        ordering = self.reverse_ordering(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            nullable = self.get_nullable_fields(queryset, ordering)
+            try:
+                queryset = queryset.filter(self.build_position_filter(ordering, position, nullable))
+            except (TypeError, ValueError, ValidationError):
+                # Значение курсора не подходит к типу поля.
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+                if page_size > 0:
+                    return min(page_size, self.max_page_size) if self.max_page_size else page_size
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """Возвращает уникальный порядок сортировки, оканчивающийся первичным ключом."""
+        pk_name = queryset.model._meta.pk.name
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        for field in ordering:
+            if not isinstance(field, str) or field == '?':
+                raise ImproperlyConfigured(
+                    f'{self.__class__.__name__} поддерживает сортировку только по именам полей, получено {field!r}.'
+                )
+        ordering = [f'-{pk_name}' if field == '-pk' else pk_name if field == 'pk' else field for field in ordering]
+        if not any(field.lstrip('-') == pk_name for field in ordering):
+            ordering.append(pk_name)
+        return ordering
+
+    @staticmethod
+    def reverse_ordering(ordering):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+    @staticmethod
+    def get_nullable_fields(queryset, ordering):
+        """
+        Поля сортировки, которые могут быть NULL: поле или связь на пути к нему допускает NULL или это аннотация.
+        Обратная связь может отсутствовать, если queryset не присоединяет её таблицу через INNER JOIN.
+        """
+        inner_tables = {
+            join.table_name for join in queryset.query.alias_map.values() if getattr(join, 'join_type', None) == INNER
+        }
+        nullable = set()
+        for field in ordering:
+            name = field.lstrip('-')
+            if name in queryset.query.annotations:
+                nullable.add(name)
+                continue
+            opts = queryset.model._meta
+            for part in name.split(LOOKUP_SEP):
+                try:
+                    model_field = opts.get_field(part)
+                except FieldDoesNotExist:
+                    break
+                if model_field.is_relation and not model_field.concrete:
+                    if model_field.related_model._meta.db_table not in inner_tables:
+                        nullable.add(name)
+                        break
+                elif model_field.null:
+                    nullable.add(name)
+                    break
+                if model_field.is_relation:
+                    opts = model_field.related_model._meta
+        return nullable
+
+    @staticmethod
+    def build_position_filter(ordering, position, nullable=frozenset()):
+        """
+        Строит условие «строго после позиции» для лексикографического порядка.
+        Первое условие (field >= value) позволяет использовать индекс для сканирования диапазона.
+        NULL больше любого значения: после него по возрастанию нет значений, по убыванию идут все непустые.
+        """
+        conditions = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            value = position[index]
+            equal = reduce(and_, (_equal(ordering[prev].lstrip('-'), position[prev]) for prev in range(index)), Q())
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if descending else None
+            else:
+                after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if name in nullable and not descending:
+                    after |= Q(**{f'{name}__isnull': True})
+            if after is not None:
+                conditions.append(equal & after)
+        if not conditions:
+            # Позиция - последняя возможная: после неё записей нет.
+            return Q(pk__in=[])
+        first, value = ordering[0].lstrip('-'), position[0]
+        if value is None:
+            leading = Q() if ordering[0].startswith('-') else Q(**{f'{first}__isnull': True})
+        elif ordering[0].startswith('-'):
+            leading = Q(**{f'{first}__lte': value})
+        else:
+            leading = Q(**{f'{first}__gte': value})
+            if first in nullable:
+                leading |= Q(**{f'{first}__isnull': True})
+        return leading & reduce(or_, conditions)
+
+    def get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = reduce(getattr, field.lstrip('-').split('__'), instance)
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position, reverse = cursor['p'], bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        if not all(value is None or isinstance(value, (str, int, float)) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse=False):
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        data = json.dumps(cursor, cls=CursorJSONEncoder, separators=(',', ':'), ensure_ascii=False)
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param) if self.reverse else None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return None if self.reverse else remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict([('next', self.get_next_link()), ('previous', self.get_previous_link()), ('results', data)])
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.cursor_query_description,
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.page_size_query_description,
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,64 @@
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Типы, которые orjson не сериализует сам (Decimal, ленивые строки, QuerySet и т.д.), и datetime
+# (чтобы формат совпадал с JSONRenderer) преобразуются так же, как в DRF: Decimal - в число,
+# так как COERCE_DECIMAL_TO_STRING выключен.
+encode_default = JSONEncoder().default
+
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON-рендерер на orjson."""
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=encode_default, option=self.options)
+
+
+class ORJSONParser(BaseParser):
+    """JSON-парсер на orjson."""
+
+    media_type = 'application/json'
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise ParseError(f'JSON parse error - {error}')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack для внутренних клиентов; выбирается по Accept: application/msgpack или ?format=msgpack."""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """Парсер тел запросов в MessagePack."""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (msgpack.ExtraData, msgpack.FormatError, msgpack.StackError, ValueError) as error:
+            raise ParseError(f'MessagePack parse error - {error}')
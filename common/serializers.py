@@ -0,0 +1,54 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+SPARSE_FIELDSET_PARAMETERS = [
+    OpenApiParameter('fields', OpenApiTypes.STR, description='Выводимые поля через запятую, по умолчанию - все'),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description='Разворачиваемые вложенные объекты через запятую, по умолчанию - все; остальные выводятся id',
+    ),
+]
+
+
+def parse_list_param(request, name):
+    """Возвращает множество значений параметра вида ?name=a,b или None, если параметр не передан."""
+    if request is None or name not in request.query_params:
+        return None
+    return {value.strip() for value in request.query_params[name].split(',') if value.strip()}
+
+
+def get_sparse_fieldset(request):
+    """Возвращает запрошенные поля и разворачиваемые объекты (None - без ограничений)."""
+    return parse_list_param(request, 'fields'), parse_list_param(request, 'expand')
+
+
+def get_output_fieldset(serializer_class, request):
+    """Возвращает поля, которые выведет serializer_class для запроса, и разворачиваемые объекты."""
+    fields, expand = get_sparse_fieldset(request)
+    declared = set(serializer_class.Meta.fields)
+    expandable = set(getattr(serializer_class, 'expandable_fields', ()))
+    return declared if fields is None else declared & fields, expandable if expand is None else expandable & expand
+
+
+class SparseFieldsetMixin:
+    """
+    Оставляет в ответе только поля из параметра ?fields=.
+    Вложенные объекты из expandable_fields, не перечисленные в ?expand=, выводятся первичными ключами.
+    Невыводимые поля не вычисляются, а вьюсеты по тем же параметрам не подгружают лишние связи.
+    """
+
+    expandable_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = get_sparse_fieldset(self.context.get('request'))
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        if expand is not None:
+            for name in self.expandable_fields:
+                if name in fields and name not in expand:
+                    many = isinstance(fields[name], serializers.ListSerializer)
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many)
+        return fields
@@ -0,0 +1,26 @@
+import pytest
+from django.urls import reverse
+
+from apps.product.tests.factories import ColorFactory, ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_response_cache_is_invalidated_by_version_bump(api_client, django_capture_on_commit_callbacks):
+    url = reverse('api:colors-list')
+    assert api_client.get(url)['X-Cache'] == 'MISS'
+    assert api_client.get(url)['X-Cache'] == 'HIT'
+    with django_capture_on_commit_callbacks(execute=True):
+        ColorFactory()
+    response = api_client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert len(response.data['results']) == 1
+
+
+def test_response_cache_disabled(api_client, settings):
+    settings.RESPONSE_CACHE_ENABLED = False
+    ColorFactory()
+    for _ in range(2):
+        assert 'X-Cache' not in api_client.get(reverse('api:colors-list'))
+    product = ProductFactory()
+    assert 'ETag' not in api_client.get(reverse('api:products-detail', args=[product.pk]))
@@ -0,0 +1,83 @@
+import base64
+import datetime
+import json
+
+import pytest
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.orders.models import Order
+from apps.product.models import FurnitureDetails
+from common.pagination import KeysetCursorPagination
+
+pytestmark = pytest.mark.django_db
+
+
+def paginate(queryset, url):
+    paginator = KeysetCursorPagination()
+    page = paginator.paginate_queryset(queryset, Request(APIRequestFactory().get(url)))
+    return [obj.pk for obj in page], paginator.get_next_link(), paginator.get_previous_link()
+
+
+def walk(queryset, page_size, max_pages=20):
+    """Проходит страницы вперёд до последней, а от неё назад; возвращает pk обоих проходов в порядке списка."""
+    pages, url = [], f'/items/?page_size={page_size}'
+    while url:
+        assert len(pages) < max_pages, 'страницы повторяются'
+        pks, url, previous = paginate(queryset, url)
+        pages.append(pks)
+    backward, count = pages[-1], 1
+    while previous:
+        assert count < max_pages, 'страницы повторяются'
+        pks, _, previous = paginate(queryset, previous)
+        backward, count = pks + backward, count + 1
+    return [pk for page in pages for pk in page], backward
+
+
+def encode(position):
+    return base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+
+
+@pytest.mark.parametrize('ordering', ['purpose', '-purpose'])
+@pytest.mark.parametrize('page_size', [1, 2, 3])
+def test_nullable_ordering_field(ordering, page_size):
+    for index, purpose in enumerate(['b', None, 'a', None, 'b', None, 'a']):
+        FurnitureDetails.objects.create(purpose=purpose, furniture_type=str(index))
+    queryset = FurnitureDetails.objects.order_by(ordering)
+    expected = list(queryset.order_by(ordering, 'pk').values_list('pk', flat=True))
+
+    forward, backward = walk(queryset, page_size)
+
+    assert forward == expected
+    assert backward == expected
+
+
+@pytest.mark.parametrize('page_size', [1, 2])
+def test_datetime_cursor_keeps_microseconds(page_size):
+    created = timezone.now().replace(microsecond=123000)
+    for microseconds in (456, 1, 999, 1, 0):
+        order = Order.objects.create()
+        Order.objects.filter(pk=order.pk).update(created=created + datetime.timedelta(microseconds=microseconds))
+    queryset = Order.objects.all()
+    expected = list(queryset.order_by('-created', 'pk').values_list('pk', flat=True))
+
+    forward, backward = walk(queryset, page_size)
+
+    assert forward == expected
+    assert backward == expected
+
+
+@pytest.mark.parametrize(
+    'queryset, position',
+    [
+        (FurnitureDetails.objects.all(), ['a', 'not-a-number']),
+        (FurnitureDetails.objects.all(), [{'a': 1}, 1]),
+        (Order.objects.all(), ['not-a-date', 1]),
+        (Order.objects.all(), [1]),
+    ],
+)
+def test_tampered_cursor_is_not_found(queryset, position):
+    with pytest.raises(NotFound):
+        paginate(queryset, f'/items/?cursor={encode(position)}')
@@ -1,6 +1,8 @@
 import re
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from PIL import Image
 
 
 def validate_phone(value):
@@ -8,3 +10,22 @@ def validate_phone(value):
     if re.match(pattern, value):
         return value
     raise ValidationError('Некорректный номер телефона.')
+
+
+def validate_image_dimensions(image):
+    """
+    Проверяет размеры изображения по заголовку файла.
+    Pillow открывает файл лениво и не декодирует пиксели, поэтому память не зависит от размера изображения.
+    """
+    image.seek(0)
+    try:
+        with Image.open(image) as opened:
+            width, height = opened.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Загрузите корректное изображение.')
+    finally:
+        image.seek(0)
+    if min(width, height) < settings.IMAGE_MIN_SIDE:
+        raise ValidationError(f'Минимальный размер изображения - {settings.IMAGE_MIN_SIDE} px по каждой стороне.')
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(f'Изображение больше {settings.IMAGE_MAX_PIXELS // 1_000_000} Мпикс.')
@@ -9,6 +9,7 @@ from apps.product.views import (
     CollectionViewSet,
     ColorViewSet,
     DiscountViewSet,
+    ImageUploadViewSet,
     MaterialViewSet,
     ProductViewSet,
 )
@@ -30,6 +31,7 @@ router.register('discounts', DiscountViewSet, basename='discounts')
 router.register('delivery_types', DeliveryTypeViewSet, basename='delivery_types')
 router.register('delivery', DeliveryViewSet, basename='delivery')
 router.register('orders', OrderViewSet, basename='orders')
+router.register('image_uploads', ImageUploadViewSet, basename='image_uploads')
 
 app_name = 'api'
 urlpatterns = [
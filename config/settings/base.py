@@ -2,6 +2,7 @@ from datetime import timedelta
 from pathlib import Path
 
 import environ
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
 # online_furniture_store_backend/
@@ -58,6 +59,7 @@ DJANGO_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.admin',
+    'django.contrib.postgres',
     'django.forms',
 ]
 THIRD_PARTY_APPS = [
@@ -70,7 +72,7 @@ THIRD_PARTY_APPS = [
     'import_export',
 ]
 
-LOCAL_APPS = ['apps.users', 'apps.product', 'apps.reviews', 'apps.orders']
+LOCAL_APPS = ['apps.users', 'apps.product', 'apps.reviews', 'apps.orders', 'apps.jobs']
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
@@ -139,6 +141,22 @@ STATICFILES_FINDERS = [
 MEDIA_ROOT = env('DJANGO_MEDIA_ROOT', default=str(BASE_DIR / 'media'))
 # https://docs.djangoproject.com/en/dev/ref/settings/#media-url
 MEDIA_URL = '/media/'
+# Ширины уменьшенных копий изображений товаров и коллекций (WebP и JPEG), px.
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+IMAGE_VARIANT_QUALITY = 80
+# Процессы для построения копий после загрузки; 0 - строить сразу в процессе запроса.
+IMAGE_PROCESS_WORKERS = env.int('DJANGO_IMAGE_PROCESS_WORKERS', default=2)
+IMAGE_MIN_SIDE = 100
+IMAGE_MAX_PIXELS = 50_000_000
+# https://docs.djangoproject.com/en/dev/ref/settings/#file-upload-handlers
+# Загружаемые файлы сразу пишутся во временные файлы на диске, а не в память процесса.
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+# Каталог недогруженных частей при загрузке изображений по частям; не должен раздаваться как MEDIA.
+IMAGE_UPLOAD_DIR = env('DJANGO_IMAGE_UPLOAD_DIR', default=str(BASE_DIR / 'uploads'))
+IMAGE_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+IMAGE_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+# Незавершённые загрузки старше этого срока удаляет команда clear_image_uploads, ч.
+IMAGE_UPLOAD_EXPIRE_HOURS = 24
 
 # TEMPLATES
 # ------------------------------------------------------------------------------
@@ -227,6 +245,19 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PERMISSION_CLASSES': ('rest_framework.permissions.AllowAny',),
+    'DEFAULT_RENDERER_CLASSES': (
+        'common.renderers.ORJSONRenderer',
+        'common.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'common.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'common.renderers.MessagePackParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'common.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'COERCE_DECIMAL_TO_STRING': False,
 }
@@ -235,6 +266,9 @@ REST_FRAMEWORK = {
 CORS_URLS_REGEX = r'^/api/.*$'
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Загрузка изображений по частям передаёт позицию части в заголовке Upload-Offset и возвращает её в ответе.
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset')
+CORS_EXPOSE_HEADERS = ('Upload-Offset',)
 
 # By Default swagger ui is available only to admin user(s). You can change permission classes to change that
 # See more configuration options at https://drf-spectacular.readthedocs.io/en/latest/settings.html#settings
@@ -256,6 +290,46 @@ ADMIN_EMPTY_VALUE_DISPLAY = '--пусто--'
 
 CART_SESSION_ID = 'cart'
 
+# Границы ценовых диапазонов фасета цены и время жизни кэша фасетов, сек.
+PRICE_FACET_BOUNDS = (5000, 10000, 20000, 50000)
+FACETS_CACHE_TIMEOUT = 300
+# Кэш ответов и ETag строятся по версиям моделей в кэше default (common.cache). Версии должны быть общими
+# для всех процессов (Redis); с LocMemCache другие процессы не видят изменений версий, и кэширование нужно отключить.
+RESPONSE_CACHE_ENABLED = True
+# Время жизни кэша ответов справочников, сек. Ключи версионируются, поэтому срок может быть большим.
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+# max-age анонимных ответов каталога, сек. После истечения клиенты и CDN перепроверяют ответ по ETag.
+CATALOG_CACHE_MAX_AGE = 60
+# Максимум товаров в запросе /api/products/bulk/.
+PRODUCTS_BULK_MAX_IDS = 200
+# Фоновые задачи импорта и экспорта из админки (команда run_jobs).
+# Каталог их файлов; не должен раздаваться как MEDIA.
+JOB_FILES_DIR = env('DJANGO_JOB_FILES_DIR', default=str(BASE_DIR / 'jobs'))
+# Строк импорта в одной транзакции и между сохранениями прогресса.
+JOB_CHUNK_SIZE = 1000
+# Пауза воркера между проверками пустой очереди, сек.
+JOB_POLL_INTERVAL = 5
+# Задача в работе без сохранения прогресса дольше этого времени, сек., считается брошенной упавшим воркером
+# и снова забирается из очереди.
+JOB_STALE_TIMEOUT = 30 * 60
+# Похожие товары: длина списка соседей товара и пауза между проверками очереди пересчёта, сек.
+SIMILAR_PRODUCTS_COUNT = 12
+SIMILAR_PRODUCTS_POLL_INTERVAL = 60
+# «Покупают вместе»: длина списка партнёров товара и минимум совместных заказов пары.
+BOUGHT_TOGETHER_COUNT = 10
+BOUGHT_TOGETHER_MIN_ORDERS = 2
+# Команды обслуживания, которые запускает run_schedule: команда с аргументами - период, сек.
+# Периоды отсчитываются от местной полуночи, поэтому цены пересчитываются сразу после смены дня.
+SCHEDULED_COMMANDS = {
+    'refresh_pricing': 60 * 60,
+    'update_bought_together': 60 * 60,
+    'refresh_similar_products --all': 24 * 60 * 60,
+    # Продажи заказов, изменённых не через API (см. rebuild_product_sales).
+    'rebuild_product_sales': 24 * 60 * 60,
+    # Копии изображений, задачи которых потерялись при перезапуске веб-процесса (см. common.images).
+    'generate_image_variants': 60 * 60,
+}
+
 SITE_URL = env('SITE_URL', default='https://online-furniture-store.github.io/online_furniture_store_frontend/')
 
 # Djoser settings
@@ -14,6 +14,8 @@ ALLOWED_HOSTS = ['localhost', '0.0.0.0', '127.0.0.1']
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#caches
 CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': ''}}
+# Кэш процесса не виден командам в других процессах (run_jobs, refresh_pricing), версии моделей в нём устаревают.
+RESPONSE_CACHE_ENABLED = False
 
 # EMAIL
 # ------------------------------------------------------------------------------
@@ -22,6 +22,10 @@ PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
+# MEDIA
+# ------------------------------------------------------------------------------
+IMAGE_PROCESS_WORKERS = 0
+
 # DEBUGGING FOR TEMPLATES
 # ------------------------------------------------------------------------------
 TEMPLATES[0]['OPTIONS']['debug'] = True  # type: ignore # noqa: F405
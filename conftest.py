@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from apps.users.tests.factories import UserFactory
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user(db):
+    return UserFactory()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш ответов и версий моделей не переживает тест: иначе ответ одного теста отдаётся в другом."""
+    cache.clear()